@@ -20,7 +20,10 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 
 ###################################################################################################
 
+import math
+import functools
 import numpy as np
+from collections import namedtuple
 
 ###################################################################################################
 
@@ -28,6 +31,9 @@ import numpy as np
 BURST_DEF = 16
 PHI_TASK_DEF = 6
 
+# Keys of the workload structure of arrays (one array per task parameter)
+TASK_ARRAYS = ('periods', 'c_time', 'trans_r', 'trans_w', 'phi', 'burst')
+
 # Interconnects
 D_INT_ADDR = 10
 D_INT_DATA = 10
@@ -47,6 +53,15 @@ T_TRANS = 150
 # 100 MHz
 CLK_RATE = 100 * 10**6
 
+# Latency parameters supported by the sensitivity analysis:
+# Interconnect attributes, then System attributes (PS latencies)
+SENS_INTER_PARAMS = ('d_addr', 'd_data', 'd_bresp', 't_hold_addr', 't_hold_data')
+SENS_PS_PARAMS = ('d_ps_read', 'd_ps_write')
+
+# BatchSystem early exit: drop the infeasible workloads from the
+# evaluated arrays when less than this fraction is still feasible
+COMPACT_RATIO = 0.75
+
 ###################################################################################################
 
 def clks_to_ms(clks):
@@ -55,20 +70,54 @@ def clks_to_ms(clks):
 def ms_to_clks(ms):
     return (ms * CLK_RATE) / 10**3
 
+def check_task_values(name, values):
+    '''
+    Task parameters are stored as integers (see axi_workload.Workload):
+    reject non-integer values instead of truncating them
+    '''
+    values = np.asarray(values)
+    if values.dtype.kind in 'biu':
+        return
+    
+    if not np.all(np.isfinite(values) & (values == np.trunc(values))):
+        raise ValueError('Task parameter {} must be an integer: {}'.format(name, values))
+
 ###################################################################################################
 
 class HwTask(object):
     '''
-    HW-task object
+    HW-task object, row idx of a workload structure of arrays (see axi_workload.Workload).
+    Parameters are cached as slots for fast reads, writes go through to the arrays.
+    Records are refreshed when the workload loads new parameters (see refresh())
     '''
-    def __init__(self, phi = PHI_TASK_DEF, burst_size = BURST_DEF):
-        self.phi = phi
-        self.burst_size = burst_size
+    # Attribute of each key of the structure of arrays
+    FIELDS = dict(zip(TASK_ARRAYS, ('period', 'c_time', 'trans_r', 'trans_w', 'phi', 'burst_size')))
+    KEYS = {name : key for key, name in FIELDS.items()}
+    
+    __slots__ = ('_arrays', '_idx') + tuple(FIELDS.values())
+    
+    def __init__(self, arrays, idx):
+        object.__setattr__(self, '_arrays', arrays)
+        object.__setattr__(self, '_idx', idx)
+        self.refresh()
+    
+    def refresh(self):
+        '''
+        Read again the parameters from the arrays
+        '''
+        for key, name in HwTask.FIELDS.items():
+            object.__setattr__(self, name, self._arrays[key][self._idx])
+    
+    def __setattr__(self, name, value):
+        # Other names are handled as usual, i.e., AttributeError if not a slot
+        if name not in HwTask.KEYS:
+            object.__setattr__(self, name, value)
+            return
         
-        self.trans_r = 0
-        self.trans_w = 0
-        self.c_time = 0
-        self.period = 0
+        arr = self._arrays[HwTask.KEYS[name]]
+        check_task_values(name, value)
+        arr[self._idx] = value
+        object.__setattr__(self, name, arr[self._idx])
         
     def __str__(self):
         return 'C: {: <20} T: {: <20} S: {: <20} TR: {: <20} TW: {: <20}\n'.format(
@@ -76,19 +125,52 @@ class HwTask(object):
         )
 
 
-class Interconnect(object):
+InterconnectParams = namedtuple('InterconnectParams', ['phi', 'd_addr', 'd_data', 'd_bresp',
+                                                       't_hold_addr', 't_hold_data', 't_hold_bresp'])
+
+
+class Interconnect(InterconnectParams):
     '''
-    AXI Interconnect object
+    AXI Interconnect object, immutable hence Interconnects with
+    the same parameters can share the same record (see shared())
     '''
-    def __init__(self, phi = PHI_INT_DEF, d_addr = D_INT_ADDR, d_data = D_INT_DATA, d_bresp = D_INT_BRESP,
+    __slots__ = ()
+    
+    def __new__(cls, phi = PHI_INT_DEF, d_addr = D_INT_ADDR, d_data = D_INT_DATA, d_bresp = D_INT_BRESP,
                 t_hold_addr = T_HOLD_ADDR, t_hold_data = T_HOLD_DATA, t_hold_bresp = T_HOLD_BRESP):
-        self.phi = phi
-        self.d_addr = d_addr
-        self.d_data = d_data
-        self.d_bresp = d_bresp
-        self.t_hold_addr = t_hold_addr
-        self.t_hold_data = t_hold_data
-        self.t_hold_bresp = t_hold_bresp
+        return super().__new__(cls, phi, d_addr, d_data, d_bresp, t_hold_addr, t_hold_data, t_hold_bresp)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize = None)
+    def shared(phi = PHI_INT_DEF):
+        return Interconnect(phi)
+    
+
+class FeasibilityStats(object):
+    '''
+    Counters of the task evaluations performed by the feasibility checks
+    '''
+    def __init__(self):
+        self.checks = 0
+        self.early_exits = 0
+        self.tasks_total = 0
+        self.tasks_evaluated = 0
+        
+    def merge(self, other):
+        self.checks += other.checks
+        self.early_exits += other.early_exits
+        self.tasks_total += other.tasks_total
+        self.tasks_evaluated += other.tasks_evaluated
+        
+    @property
+    def tasks_saved(self):
+        return self.tasks_total - self.tasks_evaluated
+    
+    def __str__(self):
+        saved = self.tasks_saved / self.tasks_total if self.tasks_total else 0
+        return 'Checks: {} Early exits: {} Task evaluations: {} of {} ({:.1%} saved)'.format(
+            self.checks, self.early_exits, self.tasks_evaluated, self.tasks_total, saved
+        )
     
 
 class System(object):
@@ -96,14 +178,24 @@ class System(object):
     AXI system comprising a hierarchy of Interconnects and HW-tasks
     Simple and inefficient implementation meant to be easy to read
     '''
-    def __init__(self, topology, d_ps_read = D_PS_READ, d_ps_write = D_PS_WRITE):       
+    def __init__(self, topology, d_ps_read = D_PS_READ, d_ps_write = D_PS_WRITE, stats = None):       
         self._topology = topology
         self._workload = topology.workload
         self._d_ps_read = d_ps_read
         self._d_ps_write = d_ps_write
         self._resp_times = None
+        self._stats = stats
+        self._interf_terms = None
+        
+    def check_feasible(self, early_exit = False):
+        '''
+        With early_exit, response times are computed lazily, starting from the tasks most
+        likely to miss their deadline, and the check stops at the first miss (whose index
+        is returned, not necessarily the smallest one)
+        '''
+        if early_exit and self._resp_times is None:
+            return self._check_feasible_lazy()
         
-    def check_feasible(self):
         if self._resp_times is None:
             self.get_resp_times()
             
@@ -113,9 +205,43 @@ class System(object):
         
         return [True, None]
     
+    def _get_check_order(self):
+        '''
+        Order the tasks from the smallest slack left by their transactions
+        in isolation, then from the deepest Interconnect
+        '''
+        def key(task_i):
+            task = self._workload.tasks[task_i]
+            inter_i = self._topology.tasks_adj[task_i]
+            slack = task.period - task.c_time \
+                    - task.trans_r * self._get_d_nocont_r(inter_i, task_i) \
+                    - task.trans_w * self._get_d_nocont_w(inter_i, task_i)
+            return (slack, -self._topology.get_inter_level(inter_i))
+        
+        return sorted(range(self._workload.num_tasks), key = key)
+    
+    def _check_feasible_lazy(self):
+        num_tasks = self._workload.num_tasks
+        result = [True, None]
+        num_evaluated = 0
+        
+        for task_i in self._get_check_order():
+            num_evaluated += 1
+            if self._get_resp_time(task_i) > self._workload.tasks[task_i].period:
+                result = [False, task_i]
+                break
+        
+        if self._stats is not None:
+            self._stats.checks += 1
+            self._stats.early_exits += num_evaluated < num_tasks
+            self._stats.tasks_total += num_tasks
+            self._stats.tasks_evaluated += num_evaluated
+            
+        return result
+    
     def _get_d_nocont_r(self, inter_idx, task_idx):
         # Get level and add 1 for current interconnect
-        level = len(self._topology.get_inters_below(inter_idx)) + 1
+        level = self._topology.get_inter_level(inter_idx) + 1
         inter = self._workload.inters[inter_idx]
         
         d_ncont_r = level * (inter.t_hold_addr + inter.d_addr) \
@@ -127,7 +253,7 @@ class System(object):
         
     def _get_d_nocont_w(self, inter_idx, task_idx):
         # Get level and add 1 for current interconnect
-        level = len(self._topology.get_inters_below(inter_idx)) + 1
+        level = self._topology.get_inter_level(inter_idx) + 1
         inter = self._workload.inters[inter_idx]
         
         d_ncont_w = level * (inter.t_hold_addr + inter.d_addr) \
@@ -140,96 +266,559 @@ class System(object):
     def get_resp_times(self, verbose = False):
         self._resp_times = []
         # For each task
-        for task_i, task in enumerate(self._workload.tasks):
-            tasks_acc = []
-            n_r_acc = task.trans_r
-            n_w_acc = task.trans_w
+        for task_i, _ in enumerate(self._workload.tasks):
+            self._resp_times.append(self._get_resp_time(task_i, verbose))
+        
+        if self._stats is not None:
+            self._stats.checks += 1
+            self._stats.tasks_total += len(self._resp_times)
+            self._stats.tasks_evaluated += len(self._resp_times)
             
-            # Get task's Interconnect
-            inter_i = self._topology.tasks_adj[task_i]
-            inter = self._workload.inters[inter_i]
+        return list(self._resp_times)
+    
+    def _get_resp_time(self, task_i, verbose = False, terms = None):
+        '''
+        If terms is a list, append to it the (Interconnect, read, write) transactions
+        (interfering ones, then task's own ones) whose no-contention delays add up
+        to the response time
+        '''
+        tasks = self._workload.tasks
+        task = tasks[task_i]
+        tasks_acc = []
+        n_r_acc = task.trans_r
+        n_w_acc = task.trans_w
+        
+        # Get task's Interconnect
+        inter_i = self._topology.tasks_adj[task_i]
+        inter = self._workload.inters[inter_i]
+
+        if verbose:
+            print('Task {} connected to: Interconnect {}'.format(task_i, inter_i))
+        #print('d_nocont_r {}'.format(d_nocont_r))
+        #print('d_nocont_w {}'.format(d_nocont_w))
 
+        # Delay coming from interfering transactions
+        d_r_acc = 0
+        d_w_acc = 0
+        
+        # Traverse the Interconnects from current interconnect to root
+        for inter_j in [inter_i] + self._topology.get_inters_below(inter_i):
+            eta_r_acc = 0
+            eta_w_acc = 0
+            phi_acc = 0
+            tasks_eta = []
+            
             if verbose:
-                print('Task {} connected to: Interconnect {}'.format(task_i, inter_i))
-            #print('d_nocont_r {}'.format(d_nocont_r))
-            #print('d_nocont_w {}'.format(d_nocont_w))
-
-            # Delay coming from interfering transactions
-            d_r_acc = 0
-            d_w_acc = 0
-            
-            # Traverse the Interconnects from current interconnect to root
-            for inter_j in [inter_i] + self._topology.get_inters_below(inter_i):
-                eta_r_acc = 0
-                eta_w_acc = 0
-                phi_acc = 0
-                tasks_eta = []
-                
-                if verbose:
-                    print('\tCrossing Interconnect {}'.format(inter_j))
-                
-                # Populate the list of tasks that contributes to phi
-                # i.e,, the tasks directly connected to current Interconnect
-                tasks_phi = self._topology.get_tasks_by_inter(inter_j)
-                if task_i in tasks_phi:
-                    assert inter_j == inter_i
-                    tasks_phi.remove(task_i)
-                
-                # Populate the list of tasks that contribute to eta
-                # i.e., task's whose transactions traverse the current Interconnect
-                # *invariant*: tasks_phi is a *subset* of tasks_eta
-                inters_above = [inter_j] + self._topology.get_inters_above(inter_j)
-                for inter_k in inters_above:
-                    tasks_eta.extend(self._topology.get_tasks_by_inter(inter_k))
-                
-                # Remove from the set of eta tasks the tasks that contributed to the previous step
-                tasks_eta.remove(task_i)
-                tasks_eta = [task_j for task_j in tasks_eta if task_j not in tasks_acc]
+                print('\tCrossing Interconnect {}'.format(inter_j))
+            
+            # Populate the list of tasks that contributes to phi
+            # i.e,, the tasks directly connected to current Interconnect
+            tasks_phi = self._topology.get_tasks_by_inter(inter_j)
+            if task_i in tasks_phi:
+                assert inter_j == inter_i
+                tasks_phi.remove(task_i)
+            
+            # Populate the list of tasks that contribute to eta
+            # i.e., task's whose transactions traverse the current Interconnect
+            # *invariant*: tasks_phi is a *subset* of tasks_eta
+            inters_above = [inter_j] + self._topology.get_inters_above(inter_j)
+            for inter_k in inters_above:
+                tasks_eta.extend(self._topology.get_tasks_by_inter(inter_k))
+            
+            # Remove from the set of eta tasks the tasks that contributed to the previous step
+            tasks_eta.remove(task_i)
+            tasks_eta = [task_j for task_j in tasks_eta if task_j not in tasks_acc]
 
-                # Accumulate phi for directly connected tasks
-                for task_pi in tasks_phi:
-                    phi_acc += np.minimum(self._workload.tasks[task_pi].phi, inter.phi)
-                
-                #  Accumulate phi for directly connected interconnects
-                for inter_dci in self._topology.get_inters_above_dc(inter_j):
-                    phi_acc += self._workload.inters[inter_dci].phi
-                
-                # Calculate and accumulate eta
-                for task_ei in tasks_eta:
-                    interf_trans = np.ceil(task.period / self._workload.tasks[task_ei].period + 1).astype(int)
-                    eta_r_acc += interf_trans * self._workload.tasks[task_ei].trans_r
-                    eta_w_acc += interf_trans * self._workload.tasks[task_ei].trans_w
-                    
-                # Calculate interfering transactions at current hierarchical level
-                y_r = np.minimum(n_r_acc * phi_acc, eta_r_acc)
-                y_w = np.minimum(n_w_acc * phi_acc, eta_w_acc)
-                
-                # Get transactions delay in isolation
-                d_nocont_r = self._get_d_nocont_r(inter_j, task_i)
-                d_nocont_w = self._get_d_nocont_w(inter_j, task_i)
-                
-                # Multiply the number of interfering transactions with the no-contention delays to root
-                d_r = d_nocont_r * y_r
-                d_w = d_nocont_w * y_w
-                
-                # Accumulate the dealy
-                d_r_acc += d_r
-                d_w_acc += d_w
+            # Accumulate phi for directly connected tasks
+            for task_pi in tasks_phi:
+                phi_acc += np.minimum(tasks[task_pi].phi, inter.phi)
+            
+            #  Accumulate phi for directly connected interconnects
+            for inter_dci in self._topology.get_inters_above_dc(inter_j):
+                phi_acc += self._workload.inters[inter_dci].phi
+            
+            # Calculate and accumulate eta
+            for task_ei in tasks_eta:
+                task_e = tasks[task_ei]
+                interf_trans = np.ceil(task.period / task_e.period + 1).astype(int)
+                eta_r_acc += interf_trans * task_e.trans_r
+                eta_w_acc += interf_trans * task_e.trans_w
                 
-                # Update for next cycle
-                tasks_acc += tasks_eta
-                n_r_acc += y_r
-                n_w_acc += y_w
+            # Calculate interfering transactions at current hierarchical level
+            y_r = np.minimum(n_r_acc * phi_acc, eta_r_acc)
+            y_w = np.minimum(n_w_acc * phi_acc, eta_w_acc)
+            
+            # Get transactions delay in isolation
+            d_nocont_r = self._get_d_nocont_r(inter_j, task_i)
+            d_nocont_w = self._get_d_nocont_w(inter_j, task_i)
+            
+            # Multiply the number of interfering transactions with the no-contention delays to root
+            d_r = d_nocont_r * y_r
+            d_w = d_nocont_w * y_w
+            
+            # Accumulate the dealy
+            d_r_acc += d_r
+            d_w_acc += d_w
+            
+            # Update for next cycle
+            tasks_acc += tasks_eta
+            n_r_acc += y_r
+            n_w_acc += y_w
+            
+            if terms is not None:
+                terms.append((inter_j, y_r, y_w))
+        
+        # Compute task's response time
+        d_nocont_r = self._get_d_nocont_r(inter_i, task_i)
+        d_nocont_w = self._get_d_nocont_w(inter_i, task_i)
+        
+        if terms is not None:
+            terms.append((inter_i, task.trans_r, task.trans_w))
+        
+        d_r_tot = task.trans_r * d_nocont_r + d_r_acc
+        d_w_tot = task.trans_w * d_nocont_w + d_w_acc
+        return d_r_tot + task.c_time + d_w_tot
+
+    
+    def _get_interf_terms(self):
+        '''
+        Transactions crossing each Interconnect along the path of each task, as
+        flat arrays (task, Interconnect, level, burst, read, write). They do not depend
+        on the latency parameters, hence they are computed only once
+        '''
+        if self._interf_terms is None:
+            rows = []
+            for task_i, task in enumerate(self._workload.tasks):
+                terms = []
+                self._get_resp_time(task_i, terms = terms)
+                for inter_j, n_r, n_w in terms:
+                    level = self._topology.get_inter_level(inter_j) + 1
+                    rows.append((task_i, inter_j, level, task.burst_size, n_r, n_w))
+            
+            self._interf_terms = [np.array(col) for col in zip(*rows)]
+            
+        return self._interf_terms
+    
+    def _eval_resp_times(self, scale):
+        '''
+        Response times with the latency parameters multiplied by the factors in scale
+        (parameter name -> factor), from the precomputed interference terms
+        '''
+        task_idxs, inter_idxs, levels, bursts, n_r, n_w = self._get_interf_terms()
+        
+        inter_params = {}
+        for name in SENS_INTER_PARAMS:
+            values = np.array([getattr(inter, name) for inter in self._workload.inters])
+            inter_params[name] = values[inter_idxs] * scale.get(name, 1)
+        d_ps_read = self._d_ps_read * scale.get('d_ps_read', 1)
+        d_ps_write = self._d_ps_write * scale.get('d_ps_write', 1)
+        
+        # Same as _get_d_nocont_r() and _get_d_nocont_w()
+        d_nocont_r = levels * (inter_params['t_hold_addr'] + inter_params['d_addr']) \
+                    + d_ps_read \
+                    + levels * inter_params['d_data'] \
+                    + bursts
+        d_nocont_w = levels * (inter_params['t_hold_addr'] + inter_params['d_addr']) \
+                    + bursts * inter_params['t_hold_data'] \
+                    + d_ps_write \
+                    + levels * (inter_params['d_data'] + inter_params['d_bresp'])
+        
+        c_times = np.array([task.c_time for task in self._workload.tasks])
+        delays = np.bincount(task_idxs, weights = n_r * d_nocont_r + n_w * d_nocont_w,
+                             minlength = self._workload.num_tasks)
+        
+        return c_times + delays
+    
+    def get_sensitivity(self, params = SENS_INTER_PARAMS + SENS_PS_PARAMS, max_factor = 1000, tol = 1e-6):
+        '''
+        For each latency parameter (applied to all Interconnects for Interconnect parameters),
+        find by bisection the largest scaling factor in [0, max_factor] for which the system
+        is still feasible: 0 if it is infeasible even without that latency, inf if it is
+        still feasible at max_factor. Probes reuse the precomputed interference terms
+        '''
+        periods = np.array([task.period for task in self._workload.tasks])
+        feasible = lambda name, factor: np.all(self._eval_resp_times({name : factor}) <= periods)
+        
+        factors = {}
+        for name in params:
+            if name not in SENS_INTER_PARAMS + SENS_PS_PARAMS:
+                raise ValueError('Unknown latency parameter: {}'.format(name))
+            
+            if not feasible(name, 0):
+                factors[name] = 0.0
+                continue
+            if feasible(name, max_factor):
+                factors[name] = np.inf
+                continue
+            
+            lo, hi = 0.0, float(max_factor)
+            while hi - lo > tol * max(lo, 1):
+                mid = (lo + hi) / 2
+                if feasible(name, mid):
+                    lo = mid
+                else:
+                    hi = mid
+            factors[name] = lo
         
-            # Compute and append task's response time
-            d_nocont_r = self._get_d_nocont_r(inter_i, task_i)
-            d_nocont_w = self._get_d_nocont_w(inter_i, task_i)
+        return factors
+    
+    @property
+    def workload(self):
+        return self._workload
+
+
+class IncrementalSystem(System):
+    '''
+    System keeping, for each task and each Interconnect along its path, the interference
+    contributed by each other task (eta and phi). After changing the parameters or the
+    Interconnect of a single task, only its contributions are updated and only the
+    response times that they affect are recomputed (O(N * depth) instead of O(N^2 * depth))
+    '''
+    TASK_PARAMS = ('period', 'c_time', 'trans_r', 'trans_w', 'phi', 'burst_size')
+    
+    def __init__(self, topology, d_ps_read = D_PS_READ, d_ps_write = D_PS_WRITE, stats = None):
+        super().__init__(topology, d_ps_read, d_ps_write, stats)
+        num_tasks = self._workload.num_tasks
+        
+        self._paths = [None] * num_tasks
+        self._dep_levels = np.full((num_tasks, num_tasks), -1)
+        self._eta_r = [None] * num_tasks
+        self._eta_w = [None] * num_tasks
+        self._phi = [None] * num_tasks
+        self._d_nocont = [None] * num_tasks
+        self._resp_times = [None] * num_tasks
+        self._missing = set()
+        
+        for task_i in range(num_tasks):
+            self._gen_task_path(task_i)
+        for task_i in range(num_tasks):
+            self._gen_task_deps(task_i)
+            self._gen_task_interf(task_i)
+            self._update_resp_time(task_i)
+    
+    def _gen_task_path(self, task_i):
+        inter_i = self._topology.tasks_adj[task_i]
+        self._paths[task_i] = [inter_i] + self._topology.get_inters_below(inter_i)
+    
+    def _get_dep_level(self, task_i, task_m):
+        '''
+        Position, along the path of task_i, of the Interconnect where the transactions
+        of task_m start interfering, i.e., the first common Interconnect of their paths
+        '''
+        inter_i = self._paths[task_i][0]
+        inter_c = self._topology.get_common_inter(inter_i, self._paths[task_m][0])
+        return self._topology.get_inter_level(inter_i) - self._topology.get_inter_level(inter_c)
+    
+    def _gen_task_deps(self, task_i):
+        for task_m in range(self._workload.num_tasks):
+            if task_m != task_i:
+                self._dep_levels[task_i][task_m] = self._get_dep_level(task_i, task_m)
+                self._dep_levels[task_m][task_i] = self._get_dep_level(task_m, task_i)
+    
+    def _get_contrib(self, task_i, task_m):
+        '''
+        Contribution of task_m to the interference of task_i: level, eta (read, write) and phi
+        '''
+        task = self._workload.tasks[task_i]
+        task_o = self._workload.tasks[task_m]
+        level = self._dep_levels[task_i][task_m]
+        
+        interf_trans = math.ceil(task.period / task_o.period + 1)
+        phi = 0
+        if self._topology.tasks_adj[task_m] == self._paths[task_i][level]:
+            phi = min(task_o.phi, self._workload.inters[self._paths[task_i][0]].phi)
+        
+        return level, interf_trans * task_o.trans_r, interf_trans * task_o.trans_w, phi
+    
+    def _apply_contrib(self, task_i, contrib, sign):
+        level, eta_r, eta_w, phi = contrib
+        self._eta_r[task_i][level] += sign * eta_r
+        self._eta_w[task_i][level] += sign * eta_w
+        self._phi[task_i][level] += sign * phi
+    
+    def _gen_task_interf(self, task_i):
+        path = self._paths[task_i]
+        self._eta_r[task_i] = [0] * len(path)
+        self._eta_w[task_i] = [0] * len(path)
+        self._d_nocont[task_i] = [(self._get_d_nocont_r(inter_j, task_i), self._get_d_nocont_w(inter_j, task_i))
+                                  for inter_j in path]
+        
+        # Directly connected Interconnects
+        self._phi[task_i] = [sum(self._workload.inters[inter_dci].phi
+                                 for inter_dci in self._topology.get_inters_above_dc(inter_j))
+                             for inter_j in path]
+        
+        for task_m in range(self._workload.num_tasks):
+            if task_m != task_i:
+                self._apply_contrib(task_i, self._get_contrib(task_i, task_m), 1)
+    
+    def _update_resp_time(self, task_i):
+        '''
+        Same as System._get_resp_time(), from the accumulated eta and phi
+        '''
+        task = self._workload.tasks[task_i]
+        n_r_acc = task.trans_r
+        n_w_acc = task.trans_w
+        d_r_acc = 0
+        d_w_acc = 0
+        
+        d_nocont = self._d_nocont[task_i]
+        for level, phi_acc in enumerate(self._phi[task_i]):
+            y_r = min(n_r_acc * phi_acc, self._eta_r[task_i][level])
+            y_w = min(n_w_acc * phi_acc, self._eta_w[task_i][level])
             
-            d_r_tot = task.trans_r * d_nocont_r + d_r_acc
-            d_w_tot = task.trans_w * d_nocont_w + d_w_acc
-            self._resp_times.append(d_r_tot + task.c_time + d_w_tot)
+            d_r_acc += d_nocont[level][0] * y_r
+            d_w_acc += d_nocont[level][1] * y_w
             
+            n_r_acc += y_r
+            n_w_acc += y_w
+        
+        d_r_tot = task.trans_r * d_nocont[0][0] + d_r_acc
+        d_w_tot = task.trans_w * d_nocont[0][1] + d_w_acc
+        self._resp_times[task_i] = d_r_tot + task.c_time + d_w_tot
+        
+        if self._resp_times[task_i] > task.period:
+            self._missing.add(task_i)
+        else:
+            self._missing.discard(task_i)
+    
+    def _update(self, task_m, mutate):
+        '''
+        Remove the contributions of task_m, apply the mutation, then add back
+        the new contributions and update the affected response times
+        '''
+        others = [task_i for task_i in range(self._workload.num_tasks) if task_i != task_m]
+        old_contribs = [self._get_contrib(task_i, task_m) for task_i in others]
+        
+        mutate()
+        self._interf_terms = None
+        
+        for task_i, old_contrib in zip(others, old_contribs):
+            new_contrib = self._get_contrib(task_i, task_m)
+            if new_contrib != old_contrib:
+                self._apply_contrib(task_i, old_contrib, -1)
+                self._apply_contrib(task_i, new_contrib, 1)
+                self._update_resp_time(task_i)
+        
+        self._gen_task_interf(task_m)
+        self._update_resp_time(task_m)
+    
+    def set_task_params(self, task_m, **params):
+        '''
+        Change the parameters (TASK_PARAMS) of a task
+        '''
+        for name, value in params.items():
+            if name not in IncrementalSystem.TASK_PARAMS:
+                raise ValueError('Unknown task parameter: {}'.format(name))
+            # Before any change, the accumulated interference must stay consistent
+            check_task_values(name, value)
+        
+        def mutate():
+            for name, value in params.items():
+                setattr(self._workload.tasks[task_m], name, value)
+        
+        self._update(task_m, mutate)
+    
+    def move_task(self, task_m, inter_idx):
+        '''
+        Move a task to another Interconnect
+        '''
+        assert 0 <= inter_idx < self._topology.num_inters
+        
+        def mutate():
+            tasks_adj = np.array(self._topology.tasks_adj)
+            tasks_adj[task_m] = inter_idx
+            self._topology = self._topology.with_placement(tasks_adj)
+            self._gen_task_path(task_m)
+            self._gen_task_deps(task_m)
+        
+        self._update(task_m, mutate)
+    
+    def get_resp_times(self, verbose = False):
         return list(self._resp_times)
+    
+    def check_feasible(self, early_exit = False):
+        if self._missing:
+            return [False, min(self._missing)]
+        
+        return [True, None]
+    
+    @property
+    def topology(self):
+        return self._topology
+
+
+class BatchSystem(object):
+    '''
+    Vectorized counterpart of System analysing K workloads that share the same topology.
+    Task parameters are passed as K x N arrays (structure of arrays), one row per workload.
+    The per-task interference structure only depends on the topology, hence it is computed once
+    '''
+    def __init__(self, topology, inters = None, d_ps_read = D_PS_READ, d_ps_write = D_PS_WRITE, stats = None):
+        self._topology = topology
+        self._inters = inters if inters is not None else topology.workload.inters
+        self._d_ps_read = d_ps_read
+        self._d_ps_write = d_ps_write
+        self._stats = stats
+        self._plan = [self._gen_task_plan(task_i) for task_i in range(topology.num_tasks)]
+
+    def _gen_task_plan(self, task_i):
+        '''
+        Mirror the traversal of System.get_resp_times for a single task and record, for each
+        crossed Interconnect, the tasks contributing to phi and eta
+        '''
+        plan = []
+        tasks_acc = [task_i]
+        inter_i = self._topology.tasks_adj[task_i]
+
+        for inter_j in [inter_i] + self._topology.get_inters_below(inter_i):
+            tasks_phi = [task_j for task_j in self._topology.get_tasks_by_inter(inter_j) if task_j != task_i]
+
+            tasks_eta = []
+            for inter_k in [inter_j] + self._topology.get_inters_above(inter_j):
+                tasks_eta.extend(self._topology.get_tasks_by_inter(inter_k))
+            tasks_eta = [task_j for task_j in tasks_eta if task_j not in tasks_acc]
+            tasks_acc += tasks_eta
+
+            phi_dc = 0
+            for inter_dci in self._topology.get_inters_above_dc(inter_j):
+                phi_dc += self._inters[inter_dci].phi
+
+            level = self._topology.get_inter_level(inter_j) + 1
+            plan.append((inter_j, level, np.array(tasks_phi, dtype = int), phi_dc, np.array(tasks_eta, dtype = int)))
+
+        return plan
+
+    def _get_d_nocont_r(self, inter_idx, level, burst):
+        inter = self._inters[inter_idx]
+        return level * (inter.t_hold_addr + inter.d_addr) \
+                + self._d_ps_read \
+                + level * inter.d_data \
+                + burst
+
+    def _get_d_nocont_w(self, inter_idx, level, burst):
+        inter = self._inters[inter_idx]
+        return level * (inter.t_hold_addr + inter.d_addr) \
+                + burst * inter.t_hold_data \
+                + self._d_ps_write \
+                + level * (inter.d_data + inter.d_bresp)
+
+    def _get_resp_time(self, task_i, periods, c_time, trans_r, trans_w, phi, burst):
+        '''
+        Response time of task_i for every workload (row) of the batch
+        '''
+        plan = self._plan[task_i]
+        inter_phi = self._inters[plan[0][0]].phi
+
+        n_r_acc = trans_r[:, task_i]
+        n_w_acc = trans_w[:, task_i]
+        d_r_acc = 0
+        d_w_acc = 0
+
+        for inter_j, level, tasks_phi, phi_dc, tasks_eta in plan:
+            phi_acc = np.minimum(phi[:, tasks_phi], inter_phi).sum(axis = 1) + phi_dc
+
+            interf_trans = np.ceil(periods[:, task_i, None] / periods[:, tasks_eta] + 1).astype(int)
+            eta_r_acc = (interf_trans * trans_r[:, tasks_eta]).sum(axis = 1)
+            eta_w_acc = (interf_trans * trans_w[:, tasks_eta]).sum(axis = 1)
+
+            y_r = np.minimum(n_r_acc * phi_acc, eta_r_acc)
+            y_w = np.minimum(n_w_acc * phi_acc, eta_w_acc)
+
+            d_r_acc = d_r_acc + self._get_d_nocont_r(inter_j, level, burst[:, task_i]) * y_r
+            d_w_acc = d_w_acc + self._get_d_nocont_w(inter_j, level, burst[:, task_i]) * y_w
+
+            n_r_acc = n_r_acc + y_r
+            n_w_acc = n_w_acc + y_w
+
+        inter_i, level_i = plan[0][0], plan[0][1]
+        d_r_tot = trans_r[:, task_i] * self._get_d_nocont_r(inter_i, level_i, burst[:, task_i]) + d_r_acc
+        d_w_tot = trans_w[:, task_i] * self._get_d_nocont_w(inter_i, level_i, burst[:, task_i]) + d_w_acc
+
+        return d_r_tot + c_time[:, task_i] + d_w_tot
+
+    def get_resp_times(self, periods, c_time, trans_r, trans_w, phi, burst):
+        '''
+        Return the K x N matrix of response times
+        '''
+        args = [np.atleast_2d(arr) for arr in (periods, c_time, trans_r, trans_w, phi, burst)]
+        resp_times = [self._get_resp_time(task_i, *args) for task_i in range(self._topology.num_tasks)]
+
+        return np.stack(resp_times, axis = 1)
+
+    def check_feasible(self, periods, c_time, trans_r, trans_w, phi, burst, early_exit = False):
+        '''
+        Return the K-length feasibility vector and the K x N matrix of response times.
+        With early_exit, the response times are not returned (None): tasks are evaluated one at a time,
+        starting from the ones most likely to miss their deadline, and only on the workloads
+        that are still feasible
+        '''
+        if early_exit:
+            return self._check_feasible_lazy(periods, c_time, trans_r, trans_w, phi, burst), None
+        
+        resp_times = self.get_resp_times(periods, c_time, trans_r, trans_w, phi, burst)
+        feasible = np.all(resp_times <= np.atleast_2d(periods), axis = 1)
+        
+        if self._stats is not None:
+            self._stats.checks += resp_times.shape[0]
+            self._stats.tasks_total += resp_times.size
+            self._stats.tasks_evaluated += resp_times.size
+
+        return feasible, resp_times
+    
+    def _get_check_order(self, periods, c_time, trans_r, trans_w, burst):
+        '''
+        Order the tasks from the smallest (average) slack left by their transactions
+        in isolation, relative to the period, then from the deepest Interconnect
+        '''
+        slacks = []
+        levels = []
+        for task_i, plan in enumerate(self._plan):
+            inter_i, level_i = plan[0][0], plan[0][1]
+            slack = periods[:, task_i] - c_time[:, task_i] \
+                    - trans_r[:, task_i] * self._get_d_nocont_r(inter_i, level_i, burst[:, task_i]) \
+                    - trans_w[:, task_i] * self._get_d_nocont_w(inter_i, level_i, burst[:, task_i])
+            slacks.append(np.mean(slack / periods[:, task_i]))
+            levels.append(level_i)
+        
+        return np.lexsort((-np.array(levels), np.array(slacks)))
+    
+    def _check_feasible_lazy(self, periods, c_time, trans_r, trans_w, phi, burst):
+        args = [np.atleast_2d(arr) for arr in (periods, c_time, trans_r, trans_w, phi, burst)]
+        num_sets, num_tasks = args[0].shape
+        feasible = np.full(num_sets, True)
+        
+        # Rows (workloads) under evaluation: the arrays are compacted only when
+        # enough of them turn out to be infeasible, to limit copies
+        rows = np.arange(num_sets)
+        rows_args = args
+        num_evaluated = 0
+        
+        # Same as System: an early exit is a workload whose first miss leaves tasks unevaluated
+        num_early_exits = 0
+        
+        for pos, task_i in enumerate(self._get_check_order(*args[:4], args[5])):
+            num_evaluated += rows.shape[0]
+            miss = self._get_resp_time(task_i, *rows_args) > rows_args[0][:, task_i]
+            if pos < num_tasks - 1:
+                num_early_exits += np.count_nonzero(miss & feasible[rows])
+            feasible[rows[miss]] = False
+            
+            keep = feasible[rows]
+            num_keep = np.count_nonzero(keep)
+            if num_keep == 0:
+                break
+            if num_keep < COMPACT_RATIO * rows.shape[0]:
+                rows = rows[keep]
+                rows_args = [arr[keep] for arr in rows_args]
+        
+        if self._stats is not None:
+            self._stats.checks += num_sets
+            self._stats.early_exits += num_early_exits
+            self._stats.tasks_total += num_sets * num_tasks
+            self._stats.tasks_evaluated += num_evaluated
+        
+        return feasible
 
 
 ###################################################################################################
@@ -23,119 +23,345 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 import copy
 import numpy as np
 from abc import ABC
+from collections import OrderedDict, namedtuple
 
-import matplotlib.pyplot as plt
-import networkx as nx
+###################################################################################################
+
+def _to_csr(keys, values, num_keys):
+    '''
+    Pack (key, value) pairs into CSR-style arrays, values of each key are kept in input order
+    '''
+    order = np.argsort(keys, kind = 'stable')
+    ptr = np.zeros(num_keys + 1, dtype = int)
+    ptr[1:] = np.cumsum(np.bincount(keys, minlength = num_keys))
+    
+    return ptr, np.asarray(values, dtype = int)[order]
+
+
+class TopologyIndex(object):
+    '''
+    Immutable index of a topology built from the parent of each Interconnect
+    (-1 for the root) and the Interconnect of each HW-task.
+    Lists are stored as CSR-style arrays (ptr, values), subtrees as intervals of
+    a DFS (Euler tour) order and ancestors by binary lifting, hence memory and build time
+    are O(M log(depth)), and each query costs O(log(depth)) or O(answer size)
+    '''
+    def __init__(self, inters_parent, tasks_adj):
+        inters_parent = np.asarray(inters_parent, dtype = int)
+        tasks_adj = np.asarray(tasks_adj, dtype = int)
+        num_inters = inters_parent.shape[0]
+        inters = np.arange(num_inters)
+        
+        # Directly connected Interconnects (children) in ascending order
+        children = inters[inters_parent >= 0]
+        self._above_dc_ptr, self._above_dc = _to_csr(inters_parent[children], children, num_inters)
+        
+        # Tasks directly connected to each Interconnect in ascending order
+        self._tasks_ptr, self._tasks = _to_csr(tasks_adj, np.arange(tasks_adj.shape[0]), num_inters)
+        
+        # Euler tour (iterative DFS from the roots): the subtree of each Interconnect
+        # is the interval [enter, leave) of the DFS order
+        self._order = np.zeros(num_inters, dtype = int)
+        self._enter = np.zeros(num_inters, dtype = int)
+        self._leave = np.zeros(num_inters, dtype = int)
+        self._levels = np.zeros(num_inters, dtype = int)
+        above_dc_ptr, above_dc = self._above_dc_ptr.tolist(), self._above_dc.tolist()
+        order, enter, leave, levels = [], [0] * num_inters, [0] * num_inters, [0] * num_inters
+        stack = [(int(root), False) for root in reversed(inters[inters_parent < 0])]
+        while stack:
+            inter, visited = stack.pop()
+            if visited:
+                leave[inter] = len(order)
+                continue
+            enter[inter] = len(order)
+            order.append(inter)
+            stack.append((inter, True))
+            for child in reversed(above_dc[above_dc_ptr[inter]:above_dc_ptr[inter + 1]]):
+                levels[child] = levels[inter] + 1
+                stack.append((child, False))
+        self._order[:], self._enter[:], self._leave[:], self._levels[:] = order, enter, leave, levels
+        
+        # Binary lifting: self._up[k][i] is the 2^k-th ancestor of i (the root for the root)
+        up = np.where(inters_parent >= 0, inters_parent, inters)
+        self._up = [up]
+        max_level = int(self._levels.max()) if num_inters > 0 else 0
+        while 2 ** len(self._up) <= max_level:
+            up = up[up]
+            self._up.append(up)
+        
+        self._parent = inters_parent
+        for arr in [self._parent, self._levels, self._order, self._enter, self._leave, self._above_dc_ptr,
+                    self._above_dc, self._tasks_ptr, self._tasks] + self._up:
+            arr.flags.writeable = False
+    
+    def get_tasks_by_inter(self, inter_idx):
+        return self._tasks[self._tasks_ptr[inter_idx]:self._tasks_ptr[inter_idx + 1]]
+    
+    def get_inters_below(self, inter_idx):
+        '''
+        Path to the root, from the parent to the root
+        '''
+        parent = self._parent
+        below = []
+        inter_idx = parent[inter_idx]
+        while inter_idx >= 0:
+            below.append(inter_idx)
+            inter_idx = parent[inter_idx]
+        
+        return np.array(below, dtype = int)
+    
+    def get_inters_above(self, inter_idx):
+        '''
+        Subtree (excluding inter_idx) in DFS order, not ascending
+        '''
+        return self._order[self._enter[inter_idx] + 1:self._leave[inter_idx]]
+    
+    def get_inters_above_dc(self, inter_idx):
+        return self._above_dc[self._above_dc_ptr[inter_idx]:self._above_dc_ptr[inter_idx + 1]]
+    
+    def get_level(self, inter_idx):
+        return self._levels[inter_idx]
+    
+    def is_ancestor(self, inter_a, inter_b):
+        '''
+        Whether inter_a lies along the path from inter_b to the root (inter_b included)
+        '''
+        return self._enter[inter_a] <= self._enter[inter_b] < self._leave[inter_a]
+    
+    def get_lca(self, inter_a, inter_b):
+        '''
+        Lowest common ancestor, i.e., the first Interconnect shared by the paths to the root
+        '''
+        if self.is_ancestor(inter_a, inter_b):
+            return inter_a
+        if self.is_ancestor(inter_b, inter_a):
+            return inter_b
+        
+        # Climb from inter_a to the highest ancestor that is not an ancestor of inter_b
+        for up in reversed(self._up):
+            if not self.is_ancestor(up[inter_a], inter_b):
+                inter_a = up[inter_a]
+        
+        return self._up[0][inter_a]
+    
+    @property
+    def inters_parent(self):
+        return self._parent
+    
+    @property
+    def levels(self):
+        return self._levels
+    
+    @property
+    def euler_intervals(self):
+        '''
+        DFS order position where each Interconnect subtree starts (enter) and ends (leave)
+        '''
+        return self._enter, self._leave
+
+###################################################################################################
+
+# Structure of a topology, independent from the task parameters
+TopologySkeleton = namedtuple('TopologySkeleton', ['inters_parent', 'tasks_adj', 'index'])
+
+
+class SkeletonCache(object):
+    '''
+    Bounded LRU cache of read-only topology skeletons
+    '''
+    def __init__(self, max_size):
+        self._max_size = max_size
+        self._skeletons = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        skeleton = self._skeletons.get(key)
+        if skeleton is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._skeletons.move_to_end(key)
+        
+        return skeleton
+    
+    def put(self, key, skeleton):
+        self._skeletons[key] = skeleton
+        self._skeletons.move_to_end(key)
+        while len(self._skeletons) > self._max_size:
+            self._skeletons.popitem(last = False)
+    
+    def clear(self):
+        self._skeletons.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self):
+        return len(self._skeletons)
 
 ###################################################################################################
 
 class Topology(ABC):
     '''
     Topology describing:
-    1) number of Interconnects + positions via adjacency matrix (descending edges)
+    1) number of Interconnects + positions via the parent of each Interconnect (descending edges)
     2) number of HW-tasks + the position using an array
+    The dense adjacency and reachability matrices are O(M^2), hence they are built only on request
     '''
     def __init__(self, workload):
         self._workload = workload
         self._tasks_adj = np.full(workload.num_tasks, -1)
+        self._inters_parent = None
         self._inters_adj = None
         self._inters_reach = None
+        self._index = None
         
-    def _gen_inters_adj(self, num_inters):
+    def _gen_inters_adj(self):
+        '''
+        Generate adjacency matrix (descending edges) from the parent of each Interconnect
         '''
-        Generate adjacency matrix for the required number of Interconnects
+        inters = np.arange(1, self.num_inters)
+        self._inters_adj = np.full((self.num_inters, self.num_inters), False, dtype = bool)
+        self._inters_adj[inters, self._inters_parent[1:]] = True
+    
+    def _get_inters_parent(self):
+        '''
+        Get the parent (descending edge) of each Interconnect, -1 for the root
         '''
-        self._inters_adj = np.full((num_inters, num_inters), False, dtype = np.bool)
+        return self._inters_parent
     
     def _gen_inters_reach(self):
         '''
         Generate transitive closure (reachability matrix) from the transposed
         adjacency matrix (ascending edges). This matrix is used to get the subtree
-        of all Interconnects connected above a specific Interconnect
+        of all Interconnects connected above a specific Interconnect.
+        Since Interconnects form a tree, each Interconnect reaches the Interconnects whose
+        DFS order position lies in its subtree interval (see TopologyIndex), i.e., O(M^2)
         '''
-        self._inters_reach = copy.deepcopy(self._inters_adj.T)
-        
-        for k in range(self.num_inters):
-            for i in range(self.num_inters):
-                for j in range(self.num_inters):
-                    self._inters_reach[i][j] = (self._inters_reach[i][j] or
-                                    (self._inters_reach[i][k] and self._inters_reach[k][j]))
+        enter, leave = self._index.euler_intervals
+        self._inters_reach = (enter[:, None] < enter[None, :]) & (enter[None, :] < leave[:, None])
                     
+    def _gen_index(self):
+        '''
+        Build the topology index once the Interconnects and tasks positions are fixed
+        '''
+        self._index = TopologyIndex(self._get_inters_parent(), self._tasks_adj)
+        
     def get_tasks_by_inter(self, inter_idx):
         '''
         Get indexes of tasks directly connected to the Interconnect
         '''
-        tasks_idxs = []
-        for task_j, inter_i in enumerate(self._tasks_adj):
-            if inter_i == inter_idx:
-                tasks_idxs.append(task_j)
-                
-        return tasks_idxs
+        return self._index.get_tasks_by_inter(inter_idx).tolist()
     
     def get_inters_below(self, inter_idx):
         '''
         Get indexes of Interconnects lying along the path to the root Interconnect
         '''
-        inters_below = []
-        while inter_idx != 0:
-            for inter_j, is_below in enumerate(self._inters_adj[inter_idx]):               
-                if is_below:
-                    inters_below.append(inter_j)
-                    inter_idx = inter_j
-                    break
-        
-        return inters_below
+        return self._index.get_inters_below(inter_idx).tolist()
     
+    def get_inter_level(self, inter_idx):
+        '''
+        Get the number of Interconnects lying along the path to the root Interconnect
+        '''
+        return int(self._index.get_level(inter_idx))
 
     def get_inters_above(self, inter_idx):
         '''
         Get indexes of Interconnect lying along the path from the current
         interconnect to the root node
         '''
-        assert self._inters_reach is not None
-        inters_above = []
-        for inter_j, is_up in enumerate(self._inters_reach[inter_idx]):
-            if is_up:
-                inters_above.append(inter_j)
-        
-        return inters_above
-    
+        return self._index.get_inters_above(inter_idx).tolist()
 
     def get_inters_above_dc(self, inter_idx):
         '''
         Get indexes of Interconnects directly connected to (above) the current Interconnect
         '''
-        inter_above_dc = []
-        for inter_j, link in enumerate(self._inters_adj.T[inter_idx]):
-            if link:
-                inter_above_dc.append(inter_j)
-        
-        return inter_above_dc
+        return self._index.get_inters_above_dc(inter_idx).tolist()
+    
+    def get_common_inter(self, inter_a, inter_b):
+        '''
+        Get the first Interconnect shared by the paths of two Interconnects to the root
+        '''
+        return int(self._index.get_lca(inter_a, inter_b))
     
     def plot(self):
-        graph = nx.from_numpy_matrix(self._inters_adj, create_using = nx.OrderedDiGraph)
+        # Plotting libraries are only imported when needed, the analysis only requires NumPy
+        import matplotlib.pyplot as plt
+        import networkx as nx
+        
+        graph = nx.from_numpy_matrix(self.inters_adj, create_using = nx.OrderedDiGraph)
         pos = nx.nx_agraph.graphviz_layout(graph, prog = "dot")
         nx.draw(graph, pos, with_labels = True)
         plt.show()
         
-    def _sanity_check(self):
+    def _get_skeleton(self):
         '''
-        Check if the topology is consistent
+        Freeze the topology structure so that it can be shared among workloads
         '''
-        if not np.allclose(self.inters_adj, np.tril(self.inters_adj)):
+        for arr in (self._inters_parent, self._tasks_adj):
+            arr.flags.writeable = False
+            
+        return TopologySkeleton(self._inters_parent, self._tasks_adj, self._index)
+    
+    def _attach(self, skeleton):
+        '''
+        Use a shared (read-only) structure
+        '''
+        assert skeleton.tasks_adj.shape[0] == self._workload.num_tasks
+        self._inters_parent, self._tasks_adj, self._index = skeleton
+        
+    def with_placement(self, tasks_adj):
+        '''
+        Copy of the topology sharing the same Interconnects, with
+        the tasks placed on the Interconnects given by tasks_adj
+        '''
+        assert len(tasks_adj) == self.num_tasks
+        topology = copy.copy(self)
+        topology._tasks_adj = np.array(tasks_adj, dtype = int)
+        topology._tasks_adj.flags.writeable = False
+        topology._index = TopologyIndex(self._index.inters_parent, topology._tasks_adj)
+        
+        return topology
+        
+    def _sanity_check(self, routing_inters = False):
+        '''
+        Check if the topology is consistent, i.e., the Interconnects form a tree rooted
+        in the first one, each parent precedes its children (triangular adjacency matrix),
+        and each Interconnect has at least one task. With routing_inters, Interconnects
+        that only route other Interconnects may have no tasks, leaves must have some
+        '''
+        inters_parent = self._inters_parent
+        if inters_parent.ndim != 1 or inters_parent.shape[0] == 0 or inters_parent[0] != -1:
+            raise RuntimeError('Interconnect 0 is not the root!')
+        
+        if np.any(inters_parent[1:] < 0):
+            raise RuntimeError('Interconnect adjacency matrix unconnected!')
+        
+        if np.any(inters_parent[1:] >= np.arange(1, self.num_inters)):
             raise RuntimeError('Interconnect adjacency matrix is not triangular!')
         
-        for inter_row in self.inters_adj[1:]:
-            if 1 not in inter_row:
-                raise RuntimeError('Interconnect adjacency matrix unconnected!')
-
-        for inter_i, _ in enumerate(self._inters_adj):
-            if not self.get_tasks_by_inter(inter_i):
-                raise RuntimeError('Interconnect without tasks!')
+        if np.any((self._tasks_adj < 0) | (self._tasks_adj >= self.num_inters)):
+            raise RuntimeError('Task connected to a missing Interconnect!')
+        
+        without_tasks = np.bincount(self._tasks_adj, minlength = self.num_inters) == 0
+        if routing_inters:
+            without_tasks[inters_parent[1:]] = False
+        if np.any(without_tasks):
+            raise RuntimeError('Interconnect without tasks!')
+        
+    def save(self, path):
+        '''
+        Save the topology in the format read by TreeTopology.load
+        '''
+        with open(path, 'w') as topo_file:
+            topo_file.write('# Parent of each Interconnect\n')
+            topo_file.write(' '.join(str(inter) for inter in self._inters_parent) + '\n')
+            topo_file.write('# Interconnect of each HW-task\n')
+            topo_file.write(' '.join(str(inter) for inter in self._tasks_adj) + '\n')
 
     def __str__(self):
         rout = 'Inter\tTasks\n'
-        for inter_i, _ in enumerate(self._inters_adj):
+        for inter_i in range(self.num_inters):
             tasks = self.get_tasks_by_inter(inter_i)
             rout += str(inter_i) + '\t' + str(len(tasks)) + ': ' + str(tasks) + '\n'
         
@@ -143,11 +369,17 @@ class Topology(ABC):
         
     @property
     def inters_adj(self):
+        if self._inters_adj is None:
+            self._gen_inters_adj()
         return self._inters_adj
 
+    @property
+    def inters_parent(self):
+        return self._inters_parent
+
     @property
     def num_inters(self):
-        return self._inters_adj.shape[0]
+        return self._inters_parent.shape[0]
 
     @property
     def tasks_adj(self):
@@ -159,8 +391,14 @@ class Topology(ABC):
     
     @property
     def inters_reach(self):
+        if self._inters_reach is None:
+            self._gen_inters_reach()
         return self._inters_reach
     
+    @property
+    def index(self):
+        return self._index
+    
     @property
     def workload(self):
         return self._workload
@@ -177,24 +415,35 @@ class BinaryEvenTopology(Topology):
     Generate a binary topology, i.e., binary tree of Interconnects with
     positions for HW-tasks
     '''
-    def __init__(self, workload, num_inters, top_down = False):
+    # Skeletons shared among workloads, keyed by (num_tasks, num_inters, top_down)
+    skeleton_cache = SkeletonCache(max_size = 64)
+    
+    def __init__(self, workload, num_inters, top_down = False, cached = True):
         # At least two tasks per Interconnect
         assert workload.num_tasks >= num_inters * 2
         super().__init__(workload)
-        self._gen_inters_adj(num_inters)
         self._top_down = top_down
         
-        # Generate interconnect adjacency matrix
-        # to create a binary tree of Interconnects
-        parent_map = self._gen_inters_parent_map()
-        for row_idx in range(1, num_inters):
-            self._inters_adj[row_idx][parent_map[row_idx]] = True
-            
-        # Generate the corresponding reachability matrix
-        self._gen_inters_reach()
+        # The structure only depends on the number of tasks and Interconnects,
+        # hence it is built and checked only once and then shared among workloads
+        key = (workload.num_tasks, num_inters, top_down)
+        skeleton = BinaryEvenTopology.skeleton_cache.get(key) if cached else None
+        if skeleton is None:
+            self._gen_structure(num_inters)
+            skeleton = self._get_skeleton()
+            if cached:
+                BinaryEvenTopology.skeleton_cache.put(key, skeleton)
+        else:
+            self._attach(skeleton)
         
         # Align workload
         self._workload.set_inters(num_inters)
+        
+    def _gen_structure(self, num_inters):
+        # Generate the parent of each Interconnect
+        # to create a binary tree of Interconnects
+        self._inters_parent = np.array(self._gen_inters_parent_map(num_inters)[:num_inters], dtype = int)
+        self._inters_parent[0] = -1
 
         # Assign tasks to the Interconnects
         inters_seq = self._gen_inters_seq()
@@ -210,8 +459,9 @@ class BinaryEvenTopology(Topology):
                 ratio = 0
         
         self._sanity_check()
+        self._gen_index()
         
-    def _gen_inters_parent_map(self):
+    def _gen_inters_parent_map(self, num_inters):
         '''
         Generate a list whose elements are the 
         parent of each Interconnect
@@ -221,7 +471,7 @@ class BinaryEvenTopology(Topology):
         last_inter = 0
         
         # each new level adds 2^level Interconnects
-        while last_inter < self.num_inters:
+        while last_inter < num_inters:
             prev_inter = last_inter
             last_inter += 2 ** level
             level += 1
@@ -242,6 +492,95 @@ class BinaryEvenTopology(Topology):
         return seq
 
 
+###################################################################################################
+
+class TreeTopology(Topology):
+    '''
+    Generic tree of Interconnects (any arity, possibly unbalanced) given by the parent
+    of each Interconnect (-1 for the root) and the Interconnect of each HW-task.
+    Interconnects can be labelled in any order: they are relabelled in BFS order from the root
+    (children in ascending label order), so that the root is Interconnect 0 and each parent precedes
+    its children, inters_labels keeps the given label of each Interconnect.
+    Interconnects may only route other Interconnects (no tasks), leaves must have tasks.
+    Memory and build time are O(M log(depth)): dense matrices are never built unless requested
+    '''
+    def __init__(self, workload, inters_parent, tasks_adj):
+        assert len(tasks_adj) == workload.num_tasks
+        super().__init__(workload)
+        
+        inters_parent = np.array(inters_parent, dtype = int)
+        tasks_adj = np.array(tasks_adj, dtype = int)
+        if np.any((tasks_adj < 0) | (tasks_adj >= inters_parent.shape[0])):
+            raise RuntimeError('Task connected to a missing Interconnect!')
+        
+        self._inters_labels = TreeTopology._gen_bfs_order(inters_parent)
+        inters_index = np.empty_like(self._inters_labels)
+        inters_index[self._inters_labels] = np.arange(self._inters_labels.shape[0])
+        
+        self._inters_parent = inters_parent[self._inters_labels]
+        self._inters_parent[1:] = inters_index[self._inters_parent[1:]]
+        self._tasks_adj = inters_index[tasks_adj]
+        self._inters_labels.flags.writeable = False
+        self._sanity_check(routing_inters = True)
+        self._gen_index()
+        
+        # Align workload
+        self._workload.set_inters(self.num_inters)
+    
+    @staticmethod
+    def _gen_bfs_order(inters_parent):
+        '''
+        Given labels of the Interconnects in BFS order from the root, children in ascending label order
+        '''
+        num_inters = inters_parent.shape[0]
+        roots = np.flatnonzero(inters_parent == -1)
+        if inters_parent.ndim != 1 or roots.shape[0] != 1:
+            raise RuntimeError('The Interconnects must have exactly one root!')
+        
+        if np.any((inters_parent < -1) | (inters_parent >= num_inters)):
+            raise RuntimeError('Interconnect connected to a missing Interconnect!')
+        
+        children = np.flatnonzero(inters_parent >= 0)
+        children_ptr, children = (arr.tolist() for arr in _to_csr(inters_parent[children], children, num_inters))
+        order = [int(roots[0])]
+        inter_j = 0
+        while inter_j < len(order):
+            inter = order[inter_j]
+            order.extend(children[children_ptr[inter]:children_ptr[inter + 1]])
+            inter_j += 1
+        
+        # Interconnects not reachable from the root form cycles
+        if len(order) != num_inters:
+            raise RuntimeError('Interconnect adjacency matrix unconnected!')
+        
+        return np.array(order, dtype = int)
+    
+    @classmethod
+    def load(cls, workload, path):
+        '''
+        Load a topology from a text file containing two lines of integers (lines starting
+        with '#' are comments): the parent of each Interconnect (-1 for the root) and the
+        Interconnect of each HW-task. Interconnects are labelled 0..M-1 in any order, they are
+        relabelled in BFS order (see inters_labels), which is the order written by save()
+        '''
+        with open(path) as topo_file:
+            lines = [line.split() for line in topo_file if line.strip() and not line.lstrip().startswith('#')]
+        
+        if len(lines) != 2:
+            raise RuntimeError('Malformed topology file {}!'.format(path))
+        
+        inters_parent, tasks_adj = (np.array(line, dtype = int) for line in lines)
+        
+        return cls(workload, inters_parent, tasks_adj)
+    
+    @property
+    def inters_labels(self):
+        '''
+        Given label of each Interconnect (indexed in BFS order)
+        '''
+        return self._inters_labels
+
+
 ###################################################################################################
 
 if __name__ == '__main__':
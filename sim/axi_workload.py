@@ -30,7 +30,9 @@ import taskgen
 
 class Workload(ABC):
     '''
-    HW-tasks workload, for each HW-tasks generate internal parameters
+    HW-tasks workload, for each HW-tasks generate internal parameters.
+    Parameters are stored as a structure of integer arrays (one array per parameter, see
+    sys.TASK_ARRAYS), tasks (sys.HwTask) are records built from this structure on request
     '''
     def __init__(self, num_tasks, phi_tasks = sys.PHI_TASK_DEF,
                  phi_inters = sys.PHI_INT_DEF, burst_size = sys.BURST_DEF):
@@ -39,18 +41,45 @@ class Workload(ABC):
         self._burst_size = burst_size
 
         self._inters = None
-        self._tasks = [sys.HwTask(phi_tasks, burst_size) for _ in range(num_tasks)]
+        self._arrays = {key : np.zeros(num_tasks, dtype = int) for key in sys.TASK_ARRAYS}
+        self._arrays['phi'][:] = phi_tasks
+        self._arrays['burst'][:] = burst_size
+        
+        # Task records are created on first access
+        self._tasks = None
     
     def __str__(self):
         rout = 'Tasks\n'
-        for i, task in enumerate(self._tasks):
+        for i, task in enumerate(self.tasks):
             rout += str(i) + ':\t\t' + str(task)
             
         return rout
     
     def set_inters(self, num_inters):
-        assert num_inters <= len(self._tasks)
-        self._inters = [sys.Interconnect(self._phi_inters) for _ in range(num_inters)]
+        # Interconnects may outnumber the tasks when some only route other Interconnects
+        # Interconnects are immutable, hence all of them share the same parameters record
+        self._inters = [sys.Interconnect.shared(self._phi_inters)] * num_inters
+    
+    def to_arrays(self):
+        '''
+        Structure of arrays of the task parameters (copy), as expected by sys.BatchSystem
+        '''
+        return {key : arr.copy() for key, arr in self._arrays.items()}
+    
+    def load_arrays(self, arrays, row = 0):
+        '''
+        Set the task parameters from a row of a structure of arrays (see to_arrays),
+        parameters are integers (ValueError otherwise)
+        '''
+        for key, arr in self._arrays.items():
+            values = np.atleast_2d(arrays[key])[row]
+            sys.check_task_values(key, values)
+            arr[:] = values
+        
+        # Task records (if any) keep reading the same arrays
+        if self._tasks is not None:
+            for task in self._tasks:
+                task.refresh()
     
     @abstractmethod
     def generate(self):
@@ -58,10 +87,12 @@ class Workload(ABC):
     
     @property
     def num_tasks(self):
-        return len(self._tasks)
+        return self._arrays['periods'].shape[0]
     
     @property
     def tasks(self):
+        if self._tasks is None:
+            self._tasks = [sys.HwTask(self._arrays, i) for i in range(self.num_tasks)]
         return self._tasks
     
     @property
@@ -96,14 +127,20 @@ class RandomFixedWorkload(Workload):
     '''
     slack_func = lambda task: task.period - task.c_time
     trans_func = lambda task: task.trans_r + task.trans_w
+    
+    # Same keys on K x N arrays, used by the batch generator
+    slack_arr_func = lambda arrays: arrays['periods'] - arrays['c_time']
+    trans_arr_func = lambda arrays: arrays['trans_r'] + arrays['trans_w']
 
     slack_asc = {
         'key'       : slack_func,
+        'arr_key'   : slack_arr_func,
         'reverse'   : False
     }
     
     slack_dsc = {
         'key'       : slack_func,
+        'arr_key'   : slack_arr_func,
         'reverse'   : True
     }
 
@@ -113,10 +150,23 @@ class RandomFixedWorkload(Workload):
     def generate(self, min_period, max_period, c_to_tr_ratio, utilization, ordering, rw_ratio = None):
         assert(c_to_tr_ratio <= 1)
         
+        # Same as generate_batch() for a single taskset (same random stream)
+        base = RandomFixedWorkload.gen_base_batch(1, self.num_tasks, min_period, max_period,
+                                                  utilization, rw_ratio)
+        self.load_arrays(RandomFixedWorkload.apply_load(base, c_to_tr_ratio, ordering,
+                                                        self._phi_tasks, self._burst_size))
+        
+    @staticmethod
+    def gen_base_batch(num_sets, num_tasks, min_period, max_period, utilization, rw_ratio = None, rng = np.random):
+        '''
+        Generate the parameters of num_sets tasksets that do not depend on the bus load:
+        periods, C and the read/write ratio of the transactions (one per taskset).
+        rng is either np.random (global state) or a np.random.Generator
+        '''
         opts = {
-            'num_tasks'    : self.num_tasks,
+            'num_tasks'    : num_tasks,
             'utilization'  : utilization,
-            'num_sets'     : 1,
+            'num_sets'     : num_sets,
             'period_min'   : min_period,
             'period_max'   : max_period,
             'period_gran'  : 1,
@@ -124,28 +174,94 @@ class RandomFixedWorkload(Workload):
             'round_c'      : True
         }
         
-        # Generate a single task-set using random fixed sum
-        # Output tuples: <0:'Ugen', 1:'U', 2:'T', 3:'C'>
-        tasksets = taskgen.gen_tasksets_from_dict(opts)
+        _, periods, c_time = taskgen.gen_tasksets_arrays(opts, rng)
         
-        for i, task in enumerate(self._tasks):
-            task.period = tasksets[0][i][2].astype(int)
-            task.c_time = tasksets[0][i][3].astype(int)
-            
-            # Generate the number of task's transactions by scaling down the maximum
-            # number of transactions that the task can do within a single period
-            # (considering a fixed transaction time sys.T_TRANS).
-            trans_max = np.floor(task.c_time / sys.T_TRANS)
-            trans_tot = np.floor(trans_max * c_to_tr_ratio).astype(int)
+        if rw_ratio is None:
+            rw_ratio = rng.uniform(0.4, 0.6, size = (num_sets, 1))
             
-            if rw_ratio is None:
-                rw_ratio = np.random.uniform(0.4, 0.6)
-            
-            task.trans_r = np.rint(trans_tot * rw_ratio).astype(int)
-            task.trans_w = np.rint(trans_tot * (1 - rw_ratio)).astype(int)
+        return {
+            'periods'   : periods.astype(int),
+            'c_time'    : c_time.astype(int),
+            'rw_ratio'  : np.broadcast_to(rw_ratio, (num_sets, 1))
+        }
+    
+    @staticmethod
+    def scale_trans(base, c_to_tr_ratio):
+        '''
+        Number of read and write transactions of a batch of tasksets for the given bus load,
+        c_to_tr_ratio is either a scalar or a column (one ratio per taskset)
+        '''
+        # Same as generate(): scale down the maximum number of transactions
+        # that each task can do within a single period
+        trans_max = np.floor(base['c_time'] / sys.T_TRANS)
+        trans_tot = np.floor(trans_max * c_to_tr_ratio).astype(int)
+        
+        trans_r = np.rint(trans_tot * base['rw_ratio']).astype(int)
+        trans_w = np.rint(trans_tot * (1 - base['rw_ratio'])).astype(int)
+        
+        return trans_r, trans_w
+    
+    @staticmethod
+    def order_batch(arrays, ordering):
+        '''
+        Sort the tasks of each taskset (row), stable as list.sort()
+        '''
+        key = ordering['arr_key'](arrays)
+        order = np.argsort(-key if ordering['reverse'] else key, axis = 1, kind = 'stable')
+        
+        return {name : np.take_along_axis(arr, order, axis = 1) for name, arr in arrays.items()}
+        
+    @staticmethod
+    def apply_load(base, c_to_tr_ratio, ordering, phi = sys.PHI_TASK_DEF, burst_size = sys.BURST_DEF):
+        '''
+        Complete a batch of base tasksets (see gen_base_batch) for the given bus load
+        and order their tasks. Return a dictionary of num_sets x num_tasks arrays,
+        as expected by sys.BatchSystem
+        '''
+        trans_r, trans_w = RandomFixedWorkload.scale_trans(base, c_to_tr_ratio)
+        
+        arrays = {
+            'periods'   : base['periods'],
+            'c_time'    : base['c_time'],
+            'trans_r'   : trans_r,
+            'trans_w'   : trans_w,
+            'phi'       : np.full(base['periods'].shape, phi),
+            'burst'     : np.full(base['periods'].shape, burst_size)
+        }
+        
+        return RandomFixedWorkload.order_batch(arrays, ordering)
+    
+    @staticmethod
+    def generate_batch(num_sets, num_tasks, min_period, max_period, c_to_tr_ratio, utilization, ordering,
+                       rw_ratio = None, phi = sys.PHI_TASK_DEF, burst_size = sys.BURST_DEF, rng = np.random):
+        '''
+        Vectorized generate() for num_sets tasksets at once. Return a dictionary of
+        num_sets x num_tasks arrays, as expected by sys.BatchSystem
+        '''
+        assert(c_to_tr_ratio <= 1)
+        
+        base = RandomFixedWorkload.gen_base_batch(num_sets, num_tasks, min_period, max_period,
+                                                  utilization, rw_ratio, rng)
+        
+        return RandomFixedWorkload.apply_load(base, c_to_tr_ratio, ordering, phi, burst_size)
+    
+    @staticmethod
+    def generate_batch_chunks(num_sets, chunk_size, *args, **kwargs):
+        '''
+        Streaming version of generate_batch(): yield batches of at most chunk_size tasksets
+        '''
+        for first in range(0, num_sets, chunk_size):
+            yield RandomFixedWorkload.generate_batch(min(chunk_size, num_sets - first), *args, **kwargs)
+
+###################################################################################################
 
-        # Order tasks
-        self._tasks.sort(key = ordering['key'], reverse = ordering['reverse'])
+def stack_workloads(workloads):
+    '''
+    Stack the task parameters of workloads having the same number of tasks
+    into K x N arrays, one row per workload
+    '''
+    arrays = [workload.to_arrays() for workload in workloads]
+    return {key : np.stack([arr[key] for arr in arrays]) for key in arrays[0]}
 
 ###################################################################################################
 
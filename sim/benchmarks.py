@@ -0,0 +1,352 @@
+'''
+Artifact evaluation code for the paper:
+Francesco Restuccia, Marco Pagani, Alessandro Biondi, Mauro Marinoni, and Giorgio Buttazzo,
+"Modeling and Analysis of Bus Contention for Hardware Accelerators in FPGA SoCs",
+In Proceedings of the 32nd Euromicro Conference on Real-Time Systems (ECRTS 2020), July 7-10, 2020.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+@author: Marco Pag
+'''
+
+
+###################################################################################################
+
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+import subprocess
+import platform
+import datetime
+import numpy as np
+
+import axi_topology as topo
+import axi_workload as work
+import axi_system as axi
+import taskgen
+
+###################################################################################################
+
+SEED = 100
+
+# Benchmark parameters
+UTILIZATION = 1
+C_TO_TR_RATIO = 0.5
+BATCH_SETS = 100
+
+# Modules whose startup cost is measured: NumPy alone as a reference, the analysis core and the experiment
+STARTUP_MODULES = ('numpy', 'axi_system', 'axi_workload', 'axi_topology', 'taskgen', 'experiments')
+
+# A benchmark is a regression if its time grows by more than this fraction w.r.t. the baseline
+THRESHOLD = 0.2
+
+###################################################################################################
+
+def _legacy_inters_reach(inters_adj):
+    '''
+    Reference transitive closure (Floyd–Warshall) as originally computed by
+    Topology._gen_inters_reach, kept to compare the scaling
+    '''
+    num_inters = inters_adj.shape[0]
+    inters_reach = inters_adj.T.copy()
+    
+    for k in range(num_inters):
+        for i in range(num_inters):
+            for j in range(num_inters):
+                inters_reach[i][j] = (inters_reach[i][j] or
+                                (inters_reach[i][k] and inters_reach[k][j]))
+    
+    return inters_reach
+
+
+def _best_time(func, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+        
+    return best
+
+
+def _time_per_call(func, repeat):
+    '''
+    Best time per call, each run calls func enough times to last at least 0.2 s
+    '''
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    
+    return min(timer.repeat(repeat, number)) / number
+
+
+def bench_inters_reach(num_inters_l = (8, 32, 64, 128, 512, 1024, 4096), legacy_max = 128, repeat = 3):
+    '''
+    Time the reachability matrix construction of a binary tree of Interconnects, including the
+    topology index it is derived from, against the legacy Floyd–Warshall implementation
+    (only up to legacy_max Interconnects)
+    '''
+    results = []
+    for num_inters in num_inters_l:
+        topology = topo.BinaryEvenTopology(work.DummyWorkload(num_inters * 2), num_inters, cached = False)
+        
+        def gen_inters_reach():
+            topology._gen_index()
+            topology._gen_inters_reach()
+        
+        t_new = _best_time(gen_inters_reach, repeat)
+        t_legacy = None
+        if num_inters <= legacy_max:
+            t_legacy = _best_time(lambda: _legacy_inters_reach(topology.inters_adj), 1)
+            assert np.array_equal(_legacy_inters_reach(topology.inters_adj), topology.inters_reach)
+        
+        results.append((num_inters, t_new, t_legacy))
+        
+    return results
+
+
+def print_inters_reach(results):
+    print('{: <10} {: <15} {: <15} {: <10}'.format('inters', 'index+reach [s]', 'legacy [s]', 'speedup'))
+    for num_inters, t_new, t_legacy in results:
+        if t_legacy is None:
+            print('{: <10} {: <15.6f} {: <15} {: <10}'.format(num_inters, t_new, '-', '-'))
+        else:
+            print('{: <10} {: <15.6f} {: <15.6f} {: <10.1f}'.format(num_inters, t_new, t_legacy, t_legacy / t_new))
+
+###################################################################################################
+
+# Run in a fresh interpreter, as a worker process importing a module: print the import time [s],
+# the peak resident memory of the process [KiB] and whether the plotting libraries got imported.
+# On Linux, ru_maxrss survives exec (it may be the one of the parent), VmHWM does not
+_STARTUP_SCRIPT = '''
+import sys, json, time, resource
+start = time.perf_counter()
+import {}
+elapsed = time.perf_counter() - start
+try:
+    with open('/proc/self/status') as s_file:
+        rss = next(int(line.split()[1]) for line in s_file if line.startswith('VmHWM:'))
+except OSError:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = rss // 1024 if sys.platform == 'darwin' else rss
+print(json.dumps([elapsed, rss, 'matplotlib' in sys.modules or 'networkx' in sys.modules]))
+'''
+
+
+def bench_startup(modules = STARTUP_MODULES, repeat = 5):
+    '''
+    Import time (best of repeat fresh interpreters), peak RSS [MiB] of the process and
+    plotting libraries loaded, for each module
+    '''
+    results = []
+    for module in modules:
+        runs = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT.format(module)], check = True,
+                                 capture_output = True, text = True, cwd = os.path.dirname(os.path.abspath(__file__)))
+            runs.append(json.loads(out.stdout))
+        
+        results.append((module, min(run[0] for run in runs), min(run[1] for run in runs) / 1024, runs[0][2]))
+    
+    return results
+
+
+def print_startup(results):
+    print('{: <15} {: <12} {: <15} {: <10}'.format('module', 'import [s]', 'peak RSS [MiB]', 'plotting'))
+    for module, t_import, rss, plotting in results:
+        print('{: <15} {: <12.4f} {: <15.1f} {: <10}'.format(module, t_import, rss, 'yes' if plotting else 'no'))
+
+###################################################################################################
+
+def _gen_workload(num_tasks):
+    workload = work.RandomFixedWorkload(num_tasks)
+    workload.generate(axi.ms_to_clks(10), axi.ms_to_clks(100), C_TO_TR_RATIO, UTILIZATION,
+                      work.RandomFixedWorkload.slack_asc)
+    return workload
+
+
+def setup_resp_times(num_tasks, num_inters):
+    system = axi.System(topo.BinaryEvenTopology(_gen_workload(num_tasks), num_inters))
+    return system.get_resp_times
+
+
+def setup_batch_resp_times(num_tasks, num_inters):
+    topology = topo.BinaryEvenTopology(work.DummyWorkload(num_tasks), num_inters)
+    arrays = work.RandomFixedWorkload.generate_batch(BATCH_SETS, num_tasks, axi.ms_to_clks(10), axi.ms_to_clks(100),
+                                                     C_TO_TR_RATIO, UTILIZATION, work.RandomFixedWorkload.slack_asc)
+    system = axi.BatchSystem(topology)
+    return lambda: system.get_resp_times(**arrays)
+
+
+def setup_topology(num_tasks, num_inters):
+    workload = _gen_workload(num_tasks)
+    return lambda: topo.BinaryEvenTopology(workload, num_inters, cached = False)
+
+
+def setup_chain_topology(num_inters):
+    '''
+    Unbalanced worst case: a chain of Interconnects (depth M), one task each
+    '''
+    workload = work.DummyWorkload(num_inters)
+    inters_parent = np.arange(-1, num_inters - 1)
+    return lambda: topo.TreeTopology(workload, inters_parent, np.arange(num_inters))
+
+
+def setup_generate(num_tasks):
+    workload = work.RandomFixedWorkload(num_tasks)
+    return lambda: workload.generate(axi.ms_to_clks(10), axi.ms_to_clks(100), C_TO_TR_RATIO, UTILIZATION,
+                                     work.RandomFixedWorkload.slack_asc)
+
+
+def setup_stafford(num_tasks, num_sets):
+    return lambda: taskgen.StaffordRandFixedSum(num_tasks, UTILIZATION, num_sets)
+
+
+# Benchmarks: name -> (setup, sizes, names of the size parameters). The setup
+# returns the function to be timed, sizes range from the configurations of the paper
+# (4-24 tasks, 1-8 Interconnects) to thousands of tasks and hundreds of Interconnects
+# (tens of thousands of Interconnects for the chain topology, to check that it scales linearly).
+# A single call of System.get_resp_times takes more than a minute with 2048 tasks, see --max-size
+BENCHMARKS = {
+    'System.get_resp_times'             : (setup_resp_times,
+                                           [(4, 1), (8, 4), (24, 8), (128, 32), (512, 128), (2048, 512)],
+                                           ('tasks', 'inters')),
+    'BatchSystem.get_resp_times'        : (setup_batch_resp_times,
+                                           [(4, 1), (8, 4), (24, 8), (128, 32), (512, 128), (1024, 256)],
+                                           ('tasks', 'inters')),
+    'BinaryEvenTopology.__init__'       : (setup_topology,
+                                           [(8, 4), (24, 8), (512, 128), (2048, 512), (8192, 2048)],
+                                           ('tasks', 'inters')),
+    'TreeTopology.__init__ (chain)'     : (setup_chain_topology,
+                                           [(8,), (512,), (2000,), (8000,), (32000,)],
+                                           ('inters',)),
+    'RandomFixedWorkload.generate'      : (setup_generate,
+                                           [(4,), (24,), (512,), (2048,)],
+                                           ('tasks',)),
+    'StaffordRandFixedSum'              : (setup_stafford,
+                                           [(24, 1), (24, 1000), (512, 100), (2048, 10)],
+                                           ('tasks', 'sets')),
+}
+
+
+def get_size_label(size, size_names):
+    return ','.join('{}={}'.format(name, value) for name, value in zip(size_names, size))
+
+
+def run_benchmarks(names = None, repeat = 5, max_size = None, verbose = True):
+    '''
+    Time per call of each benchmark at each size, as {name : {size label : seconds}}.
+    Only sizes whose first parameter (number of tasks) is at most max_size are run
+    '''
+    results = {}
+    for name, (setup, sizes, size_names) in BENCHMARKS.items():
+        if names is not None and name not in names:
+            continue
+        
+        results[name] = {}
+        for size in sizes:
+            if max_size is not None and size[0] > max_size:
+                continue
+            
+            np.random.seed(SEED)
+            func = setup(*size)
+            label = get_size_label(size, size_names)
+            results[name][label] = _time_per_call(func, repeat)
+            
+            if verbose:
+                print('{: <32} {: <20} {:.6f}'.format(name, label, results[name][label]))
+    
+    return results
+
+
+def save_results(results, path, repeat):
+    report = {
+        'meta' : {
+            'date'      : datetime.datetime.now().isoformat(timespec = 'seconds'),
+            'python'    : platform.python_version(),
+            'numpy'     : np.__version__,
+            'machine'   : platform.machine(),
+            'repeat'    : repeat
+        },
+        'results' : results
+    }
+    with open(path, 'w') as out_file:
+        json.dump(report, out_file, indent = 2)
+
+
+def load_results(path):
+    with open(path) as in_file:
+        return json.load(in_file)['results']
+
+
+def compare_results(results, baseline, threshold = THRESHOLD):
+    '''
+    Compare with the baseline the benchmarks present in both, return the
+    list of (name, size label, baseline time, time, ratio, regression)
+    '''
+    rows = []
+    for name, times in results.items():
+        for label, t_cur in times.items():
+            t_base = baseline.get(name, {}).get(label)
+            if t_base is not None:
+                ratio = t_cur / t_base
+                rows.append((name, label, t_base, t_cur, ratio, ratio > 1 + threshold))
+    
+    return rows
+
+
+def print_comparison(rows):
+    print('{: <32} {: <20} {: <12} {: <12} {: <8}'.format('benchmark', 'size', 'base [s]', 'new [s]', 'ratio'))
+    for name, label, t_base, t_cur, ratio, regression in rows:
+        print('{: <32} {: <20} {: <12.6f} {: <12.6f} {: <8.2f} {}'.format(name, label, t_base, t_cur, ratio,
+                                                                          'REGRESSION' if regression else ''))
+
+###################################################################################################
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Performance benchmarks')
+    parser.add_argument('--out', default = 'benchmarks.json',
+                        help = 'JSON file where the results are written')
+    parser.add_argument('--baseline',
+                        help = 'JSON results of a previous run to compare with')
+    parser.add_argument('--threshold', type = float, default = THRESHOLD,
+                        help = 'slowdown (fraction) w.r.t. the baseline reported as a regression')
+    parser.add_argument('--repeat', type = int, default = 5,
+                        help = 'number of runs of each benchmark, the best one is kept')
+    parser.add_argument('--only', nargs = '+', choices = list(BENCHMARKS),
+                        help = 'run only these benchmarks')
+    parser.add_argument('--max-size', type = int,
+                        help = 'skip the sizes with more tasks than this')
+    parser.add_argument('--reach', action = 'store_true',
+                        help = 'compare the reachability matrix construction with the legacy one')
+    parser.add_argument('--startup', action = 'store_true',
+                        help = 'measure the import time and memory of the modules, as seen by a worker process')
+    args = parser.parse_args()
+    
+    if args.reach:
+        print_inters_reach(bench_inters_reach())
+        sys.exit(0)
+    
+    if args.startup:
+        print_startup(bench_startup(repeat = args.repeat))
+        sys.exit(0)
+    
+    results = run_benchmarks(args.only, args.repeat, args.max_size)
+    save_results(results, args.out, args.repeat)
+    
+    if args.baseline is not None:
+        rows = compare_results(results, load_results(args.baseline), args.threshold)
+        print_comparison(rows)
+        if any(row[-1] for row in rows):
+            sys.exit(1)
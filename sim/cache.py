@@ -0,0 +1,126 @@
+'''
+Artifact evaluation code for the paper:
+Francesco Restuccia, Marco Pagani, Alessandro Biondi, Mauro Marinoni, and Giorgio Buttazzo,
+"Modeling and Analysis of Bus Contention for Hardware Accelerators in FPGA SoCs",
+In Proceedings of the 32nd Euromicro Conference on Real-Time Systems (ECRTS 2020), July 7-10, 2020.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+@author: Marco Pag
+'''
+
+
+###################################################################################################
+
+import os
+import json
+import hashlib
+
+###################################################################################################
+
+class ResultCache(object):
+    '''
+    On-disk cache of results (JSON-serializable dictionaries), addressed by the hash of the
+    parameters that produced them. Each entry is a file, the least recently used entries are
+    evicted when the total size exceeds max_bytes
+    '''
+    def __init__(self, root, max_bytes = 64 * 2**20):
+        self._root = root
+        self._max_bytes = max_bytes
+        os.makedirs(root, exist_ok = True)
+    
+    @staticmethod
+    def get_key(params):
+        return hashlib.sha256(json.dumps(params, sort_keys = True).encode()).hexdigest()
+    
+    def _get_path(self, key):
+        return os.path.join(self._root, key + '.json')
+    
+    def _get_entries(self):
+        '''
+        Path, last use time and size of each entry
+        '''
+        entries = []
+        for name in os.listdir(self._root):
+            if name.endswith('.json'):
+                path = os.path.join(self._root, name)
+                stat = os.stat(path)
+                entries.append((path, stat.st_mtime, stat.st_size))
+        
+        return entries
+    
+    def get(self, params):
+        '''
+        Cached result of the parameters, None if missing
+        '''
+        path = self._get_path(ResultCache.get_key(params))
+        try:
+            with open(path) as c_file:
+                entry = json.load(c_file)
+        except (FileNotFoundError, ValueError):
+            return None
+        
+        # Mark as recently used
+        os.utime(path)
+        return entry['result']
+    
+    def put(self, params, result):
+        path = self._get_path(ResultCache.get_key(params))
+        with open(path + '.tmp', 'w') as c_file:
+            json.dump({'params' : params, 'result' : result}, c_file, sort_keys = True)
+        os.replace(path + '.tmp', path)
+        
+        self.evict()
+    
+    def evict(self):
+        '''
+        Remove the least recently used entries until the cache fits in max_bytes
+        '''
+        entries = sorted(self._get_entries(), key = lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self._max_bytes:
+                break
+            os.remove(path)
+            total -= size
+    
+    def invalidate(self, predicate = None):
+        '''
+        Remove the entries whose parameters satisfy predicate (all if None),
+        return the number of removed entries
+        '''
+        removed = 0
+        for path, _, _ in self._get_entries():
+            if predicate is not None:
+                try:
+                    with open(path) as c_file:
+                        params = json.load(c_file)['params']
+                except ValueError:
+                    params = None
+                if params is not None and not predicate(params):
+                    continue
+            os.remove(path)
+            removed += 1
+        
+        return removed
+    
+    @property
+    def size(self):
+        return sum(size for _, _, size in self._get_entries())
+    
+    def __len__(self):
+        return len(self._get_entries())
+
+###################################################################################################
+
+if __name__ == '__main__':
+    pass
@@ -19,82 +19,991 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 '''
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 import os
+import json
+import time
+import queue
+import hashlib
+import inspect
+import argparse
+import datetime
+import functools
+import contextlib
+import multiprocessing as mp
 import concurrent.futures as fts
+from collections import namedtuple
 
 import axi_topology as topo
 import axi_workload as work
 import axi_system as sys
+import taskgen
+import journal as jrn
+import store as sto
+import cache as cch
 
 ###################################################################################################
 
 OUT_DIR = './data'
+STORE_DIR = OUT_DIR + '/store'
+CACHE_DIR = OUT_DIR + '/cache'
+
+# Default size bound of the result cache [bytes]
+CACHE_SIZE = 64 * 2**20
+
+# Experiment parameters
+UTILIZATION = 1
+TASK_PERIOD_MIN = sys.ms_to_clks(10)
+TASK_PERIOD_MAX = sys.ms_to_clks(100)
+C_TO_TR_RATIO_MIN = 0.1
+C_TO_TR_RATIO_MAX = 1.0
+
+# Ordering of the transactions among the tasks (a RandomFixedWorkload method)
+ORDERING = 'slack_asc'
+
+# Root seed of the experiment
+SEED = 100
+
+# Number of tasksets generated and analysed at once. Each block of tasksets
+# has its own random stream derived from (SEED, configuration, ratio point, block),
+# hence results do not depend on the chunk size or on the number of workers
+BLOCK_SIZE = 1000
+
+# Sweep modes:
+# 'grid': draw new tasksets for each ratio point
+# 'bisect': draw each taskset once and bisect its critical ratio point
+# 'adaptive': evaluate the ratio points of a fine grid only where the curve changes
+SWEEP_GRID = 'grid'
+SWEEP_BISECT = 'bisect'
+SWEEP_ADAPTIVE = 'adaptive'
+
+# Adaptive sweep: the first round evaluates a grid of 2**ADAPTIVE_START_LEVELS + 1 ratio points,
+# then the interval between two adjacent points is bisected while their ratios differ by more than
+# ADAPTIVE_TOL, or than the sampling noise if larger (see get_adaptive_tol)
+ADAPTIVE_START_LEVELS = 3
+ADAPTIVE_TOL = 0.01
+
+# Precision budget: the blocks of each ratio point are sampled in order until the Wilson interval
+# of its feasibility ratio (95% confidence) is narrow enough, num_tasksets is the maximum.
+# The stopping rule is checked once per block (at least BLOCK_SIZE tasksets per point), and the
+# interval is recomputed at each check: its coverage is per check, not sequentially valid
+CI_Z = 1.96
+
+# Default number of tasksets of each chunk of work (rounded up to whole blocks)
+CHUNK_SIZE = 5000
+
+# Minimum time [s] between two progress events of a worker,
+# and default time between two status lines of the parent
+PROGRESS_INTERVAL = 1.0
+STATUS_INTERVAL = 10.0
 
 ###################################################################################################
 
-def test_bin_fixed_config(num_tasks, num_inters, num_tasksets, c_to_tr_points, verbose):
-    #########################################
-    utilization = 1
+# Chunk of work: tasksets [first, last) of a ratio point of a (num_tasks, num_inters) configuration,
+# point_i is None for bisect chunks, which cover all the ratio points
+Chunk = namedtuple('Chunk', ['num_tasks', 'num_inters', 'point_i', 'c_to_tr_ratio', 'first', 'last'])
+
+# Number of feasible tasksets of each block of a chunk (for each ratio point
+# in bisect chunks), feasibility checks counters, phase timers (None if not profiling)
+ChunkResult = namedtuple('ChunkResult', ['chunk', 'num_feasible', 'log', 'stats', 'phases'])
+
+
+class PhaseStats(object):
+    '''
+    Time spent in each phase of the experiment and number of tasksets generated
+    '''
+    PHASES = ('generation', 'topology', 'analysis', 'logging')
     
-    task_period_min = sys.ms_to_clks(10)
-    task_period_max = sys.ms_to_clks(100)
+    def __init__(self):
+        self.times = dict.fromkeys(PhaseStats.PHASES, 0.0)
+        self.tasksets = 0
     
-    c_to_tr_ratio_min = 0.1
-    c_to_tr_ratio_max = 1.0
-    #########################################
-    print('Start\t tasks: {: <10} inters: {: <10}'.format(num_tasks, num_inters))
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        yield
+        self.times[name] += time.perf_counter() - start
     
-    with open('{}/log_t_{}_i_{}.txt'.format(OUT_DIR, num_tasks, num_inters), 'w') as log_file:
-        # Feasibility indexes for each bus loading (transaction density) factor
-        feasible = np.zeros(c_to_tr_points)
-        
-        # Generate a set of evenly spaced transaction density factor
-        c_to_tr_ratio_set = np.linspace(c_to_tr_ratio_min, c_to_tr_ratio_max, num = c_to_tr_points)
-        
-        # For each transaction density factor in the set
-        for i, c_to_tr_ratio in enumerate(c_to_tr_ratio_set):
-            num_feasible = 0
-            # Generate 'num_tasksets' tasksets
-            for _ in range(num_tasksets):
-                workload = work.RandomFixedWorkload(num_tasks);
-                workload.generate(
-                    min_period = task_period_min,
-                    max_period = task_period_max,
-                    c_to_tr_ratio = c_to_tr_ratio,
-                    utilization = utilization,
-                    ordering = work.RandomFixedWorkload.slack_asc
-                )
-                if verbose:
-                    log_file.write(str(workload))
-                    
-                # Generate the topology
-                topology = topo.BinaryEvenTopology(workload, num_inters, top_down = False)
-                if verbose:
-                    log_file.write(str(topology))
-            
-                system = sys.System(topology)
-                fflag, _ = system.check_feasible()
-                if fflag:
-                    num_feasible += 1
-            
-            feasible[i] = num_feasible / num_tasksets
-            
-        log_file.write(str(feasible))
+    def merge(self, other):
+        for name in PhaseStats.PHASES:
+            self.times[name] += other.times[name]
+        self.tasksets += other.tasksets
+    
+    def to_dict(self, stats = None):
+        '''
+        Phase times and counters, including the ones of the feasibility checks (stats)
+        '''
+        report = {'times' : dict(self.times), 'tasksets' : self.tasksets}
+        if stats is not None:
+            report['analyses'] = int(stats.checks)
+            report['early_exits'] = int(stats.early_exits)
         
-        # Write output file for PFG
-        with open('{}/sched_t_{}_i_{}.csv'.format(OUT_DIR, num_tasks, num_inters), 'w') as s_file:
-            for tr_ratio, sched_ratio in zip(c_to_tr_ratio_set, feasible):
-                s_file.write('{:.5f},{:.5f}\n'.format(tr_ratio, sched_ratio))
-            
-            s_file.close()
+        return report
+    
+    def __str__(self):
+        total = sum(self.times.values())
+        return 'Tasksets: {} '.format(self.tasksets) + ' '.join(
+            '{}: {:.2f}s ({:.1%})'.format(name, t, t / total if total else 0) for name, t in self.times.items()
+        )
+
+
+def get_phase(phases, name):
+    '''
+    Timer of a phase, no-op if not profiling (phases is None)
+    '''
+    return phases.phase(name) if phases is not None else contextlib.nullcontext()
+
+
+class ProgressReporter(object):
+    '''
+    Worker side of the progress reporting: the tasksets done are accumulated and sent
+    to the parent as (config, tasksets, wall clock time) events at most every interval seconds,
+    the first event (no tasksets) marks the start of the work. No-op if the queue is None
+    '''
+    def __init__(self, progress_queue, config, interval = PROGRESS_INTERVAL):
+        self._queue = progress_queue
+        self._config = config
+        self._interval = interval
+        self._pending = 0
+        self._last = time.monotonic()
         
-        print('Done\t tasks: {: <10} inters: {: <10}'.format(num_tasks, num_inters))
-        return c_to_tr_ratio_set, feasible
+        if self._queue is not None:
+            self._queue.put((config, 0, time.time()))
+    
+    def add(self, num_tasksets):
+        if self._queue is None:
+            return
+        
+        self._pending += num_tasksets
+        if time.monotonic() - self._last >= self._interval:
+            self.flush()
+    
+    def flush(self):
+        if self._queue is not None and self._pending > 0:
+            self._queue.put((self._config, self._pending, time.time()))
+            self._pending = 0
+            self._last = time.monotonic()
+
+
+class ProgressMonitor(object):
+    '''
+    Parent side of the progress reporting: aggregate the events of the workers
+    and format a status line with throughput and ETA of each running configuration and overall
+    '''
+    def __init__(self, progress_queue, totals):
+        self._queue = progress_queue
+        self._totals = totals
+        self._done = dict.fromkeys(totals, 0)
+        self._first = {}
+        self._start = time.time()
+    
+    def add_total(self, config, num_tasksets):
+        '''
+        Add work to a configuration (e.g., a new round of the adaptive sweep)
+        '''
+        self._totals[config] += num_tasksets
+    
+    def drain(self):
+        while True:
+            try:
+                config, num_tasksets, stamp = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._done[config] += num_tasksets
+            self._first[config] = min(self._first.get(config, stamp), stamp)
+    
+    @staticmethod
+    def _format(done, total, elapsed):
+        rate = done / elapsed if elapsed > 0 else 0
+        eta = str(datetime.timedelta(seconds = round((total - done) / rate))) if rate > 0 else '-'
+        return '{:.1%} {:.0f} tasksets/s ETA {}'.format(done / total if total else 1, rate, eta)
+    
+    def __str__(self):
+        now = time.time()
+        rout = 'Progress\t ' + self._format(sum(self._done.values()), sum(self._totals.values()), now - self._start)
+        for config in sorted(self._first):
+            if self._done[config] < self._totals[config]:
+                rout += ' | t_{}_i_{}: '.format(*config) \
+                        + self._format(self._done[config], self._totals[config], now - self._first[config])
+        
+        return rout
+
+
+def get_c_to_tr_ratio_set(c_to_tr_points):
+    # Generate a set of evenly spaced transaction density factor
+    return np.linspace(C_TO_TR_RATIO_MIN, C_TO_TR_RATIO_MAX, num = c_to_tr_points)
+
+
+def get_block_rng(seed, *key):
+    '''
+    Independent random stream of a block of tasksets identified by
+    (num_tasks, num_inters, point_i, block_i), or (num_tasks, num_inters, block_i) for bisect blocks
+    '''
+    seed_seq = np.random.SeedSequence(seed, spawn_key = key)
+    return np.random.default_rng(seed_seq)
+
+
+def get_block_runs(todo, blocks_per_chunk):
+    '''
+    Group the blocks still to be done (todo[block_i] is True) in runs of
+    consecutive blocks, return the list of [first, last) block indexes
+    '''
+    runs = []
+    first_block = None
+    for block_i in range(len(todo) + 1):
+        block_todo = block_i < len(todo) and todo[block_i]
+        if first_block is not None and (not block_todo or block_i - first_block == blocks_per_chunk):
+            runs.append((first_block, block_i))
+            first_block = None
+        if block_todo and first_block is None:
+            first_block = block_i
+    
+    return runs
+
+
+def in_shard(shard, unit_i, num_units):
+    '''
+    Whether the unit_i-th of the num_units blocks of a configuration belongs to shard (index, count):
+    each shard gets a range of consecutive blocks of the same size (+-1) of each configuration.
+    All the blocks belong to the run if shard is None
+    '''
+    if shard is None:
+        return True
+    
+    index, count = shard
+    return unit_i * count // num_units == index
+
+
+def gen_points_chunks(num_tasks, num_inters, num_tasksets, points, chunk_size = CHUNK_SIZE, done = frozenset(),
+                      shard = None, last_blocks = None):
+    '''
+    Split the experiment of the (point_i, c_to_tr_ratio) ratio points of a configuration into chunks
+    made of whole blocks, skipping the (num_tasks, num_inters, point_i, block_i) blocks already done
+    and the ones of the other shards. If not None, only the first last_blocks[j] blocks of points[j]
+    are split
+    '''
+    blocks_per_chunk = max(int(np.ceil(chunk_size / BLOCK_SIZE)), 1)
+    num_blocks = int(np.ceil(num_tasksets / BLOCK_SIZE))
+    
+    chunks = []
+    for point_j, (point_i, c_to_tr_ratio) in enumerate(points):
+        last_block = num_blocks if last_blocks is None else last_blocks[point_j]
+        todo = [(num_tasks, num_inters, point_i, block_i) not in done
+                and in_shard(shard, point_j * num_blocks + block_i, len(points) * num_blocks)
+                for block_i in range(last_block)]
+        for first_block, last_block in get_block_runs(todo, blocks_per_chunk):
+            chunks.append(Chunk(num_tasks, num_inters, point_i, c_to_tr_ratio, first_block * BLOCK_SIZE,
+                                min(last_block * BLOCK_SIZE, num_tasksets)))
+    
+    return chunks
+
+
+def gen_chunks(num_tasks, num_inters, num_tasksets, c_to_tr_points, chunk_size = CHUNK_SIZE, done = frozenset(),
+               shard = None, first_blocks = None):
+    '''
+    Split the experiment of a configuration into chunks made of whole blocks,
+    only the first first_blocks blocks of each ratio point if not None
+    '''
+    points = list(enumerate(get_c_to_tr_ratio_set(c_to_tr_points)))
+    last_blocks = None if first_blocks is None else [first_blocks] * len(points)
+    return gen_points_chunks(num_tasks, num_inters, num_tasksets, points, chunk_size, done, shard, last_blocks)
+
+
+def get_adaptive_levels(c_to_tr_points):
+    '''
+    Levels of the grid of the adaptive sweep: the smallest grid of 2**levels + 1
+    evenly spaced ratio points with at least c_to_tr_points points
+    '''
+    return max(int(np.ceil(np.log2(max(c_to_tr_points - 1, 1)))), ADAPTIVE_START_LEVELS)
+
+
+def get_grid_points(sweep, c_to_tr_points):
+    '''
+    Number of ratio points of the grid of a sweep, the adaptive sweep only evaluates some of them
+    '''
+    if sweep == SWEEP_ADAPTIVE:
+        return 2**get_adaptive_levels(c_to_tr_points) + 1
+    
+    return c_to_tr_points
+
+
+def get_adaptive_tol(num_tasksets, ci_width = None):
+    '''
+    Smallest change of the feasibility ratio between two ratio points refined by the adaptive sweep:
+    ADAPTIVE_TOL, or two standard deviations of the difference of two ratios (at most sqrt(0.5 / num_tasksets))
+    when smaller changes are just sampling noise. With a precision budget, the width of the intervals
+    '''
+    if ci_width is not None:
+        return max(ADAPTIVE_TOL, ci_width)
     
+    return max(ADAPTIVE_TOL, np.sqrt(2 / num_tasksets))
+
+
+def refine_points(points, feasible, tol = ADAPTIVE_TOL):
+    '''
+    Grid indexes of the ratio points evaluated by the next round of the adaptive sweep given
+    the evaluated ones (sorted points) and their feasibility ratios: the midpoint of each pair of
+    adjacent points whose ratios differ by more than tol, unless they are adjacent on the grid.
+    The feasibility ratio is (nearly) monotonic with the bus load, flat intervals are not refined
+    '''
+    return [(point_a + point_b) // 2 for point_a, point_b, feas_a, feas_b
+            in zip(points, points[1:], feasible, feasible[1:])
+            if point_b - point_a > 1 and abs(feas_b - feas_a) > tol]
+
+
+def gen_adaptive_chunks(num_tasks, num_inters, num_tasksets, c_to_tr_points, points = None, chunk_size = CHUNK_SIZE,
+                        done = frozenset(), first_blocks = None):
+    '''
+    Split a round of the adaptive sweep of a configuration into chunks made of whole blocks,
+    the round evaluates the given grid indexes (points), the ones of the initial grid if None
+    (only their first first_blocks blocks if not None). Grid indexes are the keys of the random
+    streams, hence the tasksets of each ratio point are the same as the ones of a grid sweep
+    with get_grid_points(SWEEP_ADAPTIVE, c_to_tr_points) points
+    '''
+    levels = get_adaptive_levels(c_to_tr_points)
+    c_to_tr_ratio_set = get_c_to_tr_ratio_set(2**levels + 1)
+    if points is None:
+        points = range(0, 2**levels + 1, 2**(levels - ADAPTIVE_START_LEVELS))
+    
+    points = [(point_i, c_to_tr_ratio_set[point_i]) for point_i in points]
+    last_blocks = None if first_blocks is None else [first_blocks] * len(points)
+    return gen_points_chunks(num_tasks, num_inters, num_tasksets, points, chunk_size, done, last_blocks = last_blocks)
+
+
+def get_block_sizes(num_tasksets):
+    '''
+    Number of tasksets of each block of a ratio point
+    '''
+    num_blocks = int(np.ceil(num_tasksets / BLOCK_SIZE))
+    return np.minimum(BLOCK_SIZE, num_tasksets - np.arange(num_blocks) * BLOCK_SIZE)
+
+
+def get_stop_blocks(num_feasible, num_sets, ci_width):
+    '''
+    Number of blocks after which the sampling of a ratio point stops given the cumulative number of
+    feasible tasksets and of tasksets of its first blocks: the first prefix whose Wilson interval is
+    at most ci_width wide, None if none. Since blocks are taken in order, the result does not depend
+    on how many blocks have been computed past the stopping one
+    '''
+    ci_low, ci_high = wilson_interval(num_feasible, num_sets)
+    narrow = np.flatnonzero(ci_high - ci_low <= ci_width)
+    
+    return int(narrow[0]) + 1 if narrow.shape[0] > 0 else None
+
+
+def gen_sampling_chunks(stream, num_tasks, num_inters, num_tasksets, c_to_tr_ratio_set, ci_width,
+                        chunk_size = CHUNK_SIZE, done = frozenset()):
+    '''
+    Sequential sampling of the ratio points of a configuration with blocks done (done[key] is the
+    number of feasible tasksets of a block): complete in stream the ones whose first blocks reach the
+    target precision (or all the tasksets), return the chunks sampling the others further, up to the
+    number of blocks expected to reach the precision at the current estimate of their feasibility ratio
+    '''
+    block_sizes = get_block_sizes(num_tasksets)
+    all_sets = np.cumsum(block_sizes)
+    completed = set(stream.get_points()[0])
+    sampling = sorted(set(key[2] for key in done if key[:2] == (num_tasks, num_inters)) - completed)
+    
+    points = []
+    last_blocks = []
+    for point_i in sampling:
+        # Feasible tasksets of the first blocks done, without gaps
+        block_feasible = []
+        while (num_tasks, num_inters, point_i, len(block_feasible)) in done:
+            block_feasible.append(done[(num_tasks, num_inters, point_i, len(block_feasible))])
+        num_feasible = np.cumsum(block_feasible, dtype = int)
+        
+        stop = get_stop_blocks(num_feasible, all_sets[:len(block_feasible)], ci_width)
+        if stop is None and len(block_feasible) == len(block_sizes):
+            stop = len(block_sizes)
+        if stop is not None:
+            stream.add_point(point_i, int(num_feasible[stop - 1]), int(all_sets[stop - 1]))
+            continue
+        
+        expected = len(block_sizes)
+        if block_feasible:
+            expected = get_stop_blocks(num_feasible[-1] / all_sets[len(block_feasible) - 1] * all_sets, all_sets,
+                                       ci_width) or len(block_sizes)
+        points.append((point_i, c_to_tr_ratio_set[point_i]))
+        last_blocks.append(max(expected, len(block_feasible) + 1))
+    
+    return gen_points_chunks(num_tasks, num_inters, num_tasksets, points, chunk_size, done, last_blocks = last_blocks)
+
+
+def gen_bisect_chunks(num_tasks, num_inters, num_tasksets, c_to_tr_points, chunk_size = CHUNK_SIZE, done = frozenset(),
+                      shard = None):
+    '''
+    Split the bisect experiment of a configuration into chunks made of whole blocks,
+    a block is done when all its ratio points are
+    '''
+    blocks_per_chunk = max(int(np.ceil(chunk_size / BLOCK_SIZE)), 1)
+    num_blocks = int(np.ceil(num_tasksets / BLOCK_SIZE))
+    
+    todo = [not all((num_tasks, num_inters, point_i, block_i) in done for point_i in range(c_to_tr_points))
+            and in_shard(shard, block_i, num_blocks) for block_i in range(num_blocks)]
+    
+    chunks = []
+    for first_block, last_block in get_block_runs(todo, blocks_per_chunk):
+        chunks.append(Chunk(num_tasks, num_inters, None, None, first_block * BLOCK_SIZE,
+                            min(last_block * BLOCK_SIZE, num_tasksets)))
+    
+    return chunks
+
+
+def run_chunk(chunk, seed = SEED, verbose = False, profile = False, progress_queue = None, store_root = None):
+    '''
+    Generate and analyse the tasksets of a chunk, return the number of feasible
+    tasksets of each block and the log (if verbose). With store_root, the response times
+    and periods of each taskset are saved in the result store (hence without early exit)
+    '''
+    log = []
+    num_feasible = []
+    stats = sys.FeasibilityStats()
+    phases = PhaseStats() if profile else None
+    progress = ProgressReporter(progress_queue, (chunk.num_tasks, chunk.num_inters))
+    
+    # The topology only depends on the number of tasks and Interconnects,
+    # hence the same analysis is shared among all the generated tasksets
+    with get_phase(phases, 'topology'):
+        topology = topo.BinaryEvenTopology(work.DummyWorkload(chunk.num_tasks), chunk.num_inters, top_down = False)
+        system = sys.BatchSystem(topology, stats = stats)
+    
+    store = None
+    if store_root is not None:
+        store = sto.ConfigStore(sto.get_config_path(store_root, chunk.num_tasks, chunk.num_inters), 'r+')
+    
+    for block_first in range(chunk.first, chunk.last, BLOCK_SIZE):
+        with get_phase(phases, 'generation'):
+            rng = get_block_rng(seed, chunk.num_tasks, chunk.num_inters, chunk.point_i, block_first // BLOCK_SIZE)
+            tasksets = work.RandomFixedWorkload.generate_batch(
+                num_sets = min(BLOCK_SIZE, chunk.last - block_first),
+                num_tasks = chunk.num_tasks,
+                min_period = TASK_PERIOD_MIN,
+                max_period = TASK_PERIOD_MAX,
+                c_to_tr_ratio = chunk.c_to_tr_ratio,
+                utilization = UTILIZATION,
+                ordering = getattr(work.RandomFixedWorkload, ORDERING),
+                rng = rng
+            )
+        if verbose:
+            with get_phase(phases, 'logging'):
+                for row in range(tasksets['periods'].shape[0]):
+                    workload = work.RandomFixedWorkload(chunk.num_tasks)
+                    workload.load_arrays(tasksets, row)
+                    log.append(str(workload))
+                    log.append(str(topology))
+        
+        # Unless the response times are stored, only feasibility matters:
+        # stop evaluating a taskset at its first deadline miss
+        with get_phase(phases, 'analysis'):
+            fflags, resp_times = system.check_feasible(**tasksets, early_exit = store is None)
+        num_feasible.append(int(np.count_nonzero(fflags)))
+        
+        if store is not None:
+            with get_phase(phases, 'logging'):
+                store.write_block(chunk.point_i, block_first, resp_times, tasksets['periods'])
+        
+        if phases is not None:
+            phases.tasksets += fflags.shape[0]
+        progress.add(fflags.shape[0])
+    
+    if store is not None:
+        store.flush()
+    progress.flush()
+    return ChunkResult(chunk, num_feasible, ''.join(log), stats, phases)
+
+
+def find_critical_points(system, base, c_to_tr_ratio_set, ordering):
+    '''
+    Bisect, for each base taskset (row), the index of the largest bus load in c_to_tr_ratio_set
+    for which the taskset is still feasible (-1 if none). For a given taskset, the number of
+    transactions, and hence the response times, grow monotonically with the bus load
+    '''
+    num_sets = base['periods'].shape[0]
+    
+    # Largest load known to be feasible and smallest load known to be infeasible
+    lo = np.full(num_sets, -1)
+    hi = np.full(num_sets, len(c_to_tr_ratio_set))
+    
+    while True:
+        active = np.flatnonzero(hi - lo > 1)
+        if active.shape[0] == 0:
+            break
+        
+        mid = (lo[active] + hi[active]) // 2
+        base_active = {key : arr[active] for key, arr in base.items()}
+        tasksets = work.RandomFixedWorkload.apply_load(base_active, c_to_tr_ratio_set[mid][:, None], ordering)
+        
+        fflags, _ = system.check_feasible(**tasksets, early_exit = True)
+        lo[active] = np.where(fflags, mid, lo[active])
+        hi[active] = np.where(fflags, hi[active], mid)
+    
+    return lo
+
+
+def run_bisect_chunk(chunk, c_to_tr_points, seed = SEED, verbose = False, profile = False, progress_queue = None):
+    '''
+    Generate the base tasksets of a chunk once and bisect their critical ratio point,
+    return, for each block, the number of feasible tasksets at each ratio point.
+    When profiling, applying the bus loads to the base tasksets counts as analysis
+    '''
+    log = []
+    num_feasible = []
+    stats = sys.FeasibilityStats()
+    phases = PhaseStats() if profile else None
+    progress = ProgressReporter(progress_queue, (chunk.num_tasks, chunk.num_inters))
+    c_to_tr_ratio_set = get_c_to_tr_ratio_set(c_to_tr_points)
+    
+    with get_phase(phases, 'topology'):
+        topology = topo.BinaryEvenTopology(work.DummyWorkload(chunk.num_tasks), chunk.num_inters, top_down = False)
+        system = sys.BatchSystem(topology, stats = stats)
+    
+    for block_first in range(chunk.first, chunk.last, BLOCK_SIZE):
+        with get_phase(phases, 'generation'):
+            rng = get_block_rng(seed, chunk.num_tasks, chunk.num_inters, block_first // BLOCK_SIZE)
+            base = work.RandomFixedWorkload.gen_base_batch(
+                num_sets = min(BLOCK_SIZE, chunk.last - block_first),
+                num_tasks = chunk.num_tasks,
+                min_period = TASK_PERIOD_MIN,
+                max_period = TASK_PERIOD_MAX,
+                utilization = UTILIZATION,
+                rng = rng
+            )
+        with get_phase(phases, 'analysis'):
+            crit_points = find_critical_points(system, base, c_to_tr_ratio_set,
+                                               getattr(work.RandomFixedWorkload, ORDERING))
+        if verbose:
+            with get_phase(phases, 'logging'):
+                tasksets = work.RandomFixedWorkload.apply_load(base, C_TO_TR_RATIO_MAX,
+                                                               getattr(work.RandomFixedWorkload, ORDERING))
+                for row in range(tasksets['periods'].shape[0]):
+                    workload = work.RandomFixedWorkload(chunk.num_tasks)
+                    workload.load_arrays(tasksets, row)
+                    log.append(str(workload))
+                    log.append('Critical ratio point: {}\n'.format(crit_points[row]))
+        
+        # A taskset is feasible at all the ratio points up to its critical one
+        crit_hist = np.bincount(crit_points + 1, minlength = c_to_tr_points + 1)
+        num_feasible.append(np.cumsum(crit_hist[::-1])[::-1][1:].tolist())
+        
+        if phases is not None:
+            phases.tasksets += crit_points.shape[0]
+        progress.add(crit_points.shape[0])
+    
+    progress.flush()
+    return ChunkResult(chunk, num_feasible, ''.join(log), stats, phases)
+
+
+def get_block_records(result):
+    '''
+    Journal records of the blocks of a chunk, one record for each ratio point of a bisect block
+    '''
+    chunk = result.chunk
+    records = []
+    for block_j, num_feasible in enumerate(result.num_feasible):
+        if chunk.point_i is None:
+            points = enumerate(num_feasible)
+        else:
+            points = [(chunk.point_i, num_feasible)]
+        
+        for point_i, point_feasible in points:
+            records.append({
+                'num_tasks'     : chunk.num_tasks,
+                'num_inters'    : chunk.num_inters,
+                'point'         : point_i,
+                'block'         : chunk.first // BLOCK_SIZE + block_j,
+                'num_feasible'  : point_feasible
+            })
+    
+    return records
+
+
+def get_shard_name(prefix, shard):
+    '''
+    Name of an output file of a run, suffixed with the shard of a sharded run
+    '''
+    return prefix if shard is None else '{}_shard_{}_of_{}'.format(prefix, *shard)
+
+
+def get_journal_path(shard = None):
+    '''
+    Journal of a run, each shard of a sharded run has its own
+    '''
+    return '{}/{}.jsonl'.format(OUT_DIR, get_shard_name('journal', shard))
+
+
+def get_sched_path(num_tasks, num_inters):
+    return '{}/sched_t_{}_i_{}.csv'.format(OUT_DIR, num_tasks, num_inters)
+
+
+def wilson_interval(num_feasible, num_sets, z = CI_Z):
+    '''
+    Wilson score interval of the feasibility ratio estimated from num_sets tasksets
+    '''
+    ratio = num_feasible / num_sets
+    z2_n = z**2 / num_sets
+    center = (ratio + z2_n / 2) / (1 + z2_n)
+    half_width = z * np.sqrt(ratio * (1 - ratio) / num_sets + z2_n / (4 * num_sets)) / (1 + z2_n)
+    
+    return center - half_width, center + half_width
+
 
-def parametric_workload_run_mp(num_tasksets = 1000, c_to_tr_points = 100, verbose = False):
+def format_sched_row(tr_ratio, num_feasible, num_sets, ci = False):
+    '''
+    Line of the output file for PFG: ratio point and feasibility ratio, followed
+    by the bounds of its confidence interval and the number of tasksets if ci
+    '''
+    if not ci:
+        return '{:.5f},{:.5f}\n'.format(tr_ratio, num_feasible / num_sets)
+    
+    return '{:.5f},{:.5f},{:.5f},{:.5f},{}\n'.format(tr_ratio, num_feasible / num_sets,
+                                                     *wilson_interval(num_feasible, num_sets), num_sets)
+
+
+class ResultStream(object):
+    '''
+    Streaming output of a configuration: completed ratio points are appended to the CSV file,
+    rewritten in ratio order by close(). With append, the log of an interrupted run is kept up to log_end
+    '''
+    def __init__(self, num_tasks, num_inters, c_to_tr_ratio_set, num_tasksets, ci = False, append = False,
+                 log_end = 0):
+        self._path = get_sched_path(num_tasks, num_inters)
+        self._c_to_tr_ratio_set = c_to_tr_ratio_set
+        self._num_tasksets = num_tasksets
+        self._ci = ci
+        self._num_sets = np.zeros(len(c_to_tr_ratio_set), dtype = int)
+        self._num_feasible = np.zeros(len(c_to_tr_ratio_set), dtype = int)
+        self._done = np.zeros(len(c_to_tr_ratio_set), dtype = bool)
+        
+        self._log_file = open('{}/log_t_{}_i_{}.txt'.format(OUT_DIR, num_tasks, num_inters), 'a' if append else 'w')
+        if append:
+            # Drop the logs of the chunks not journaled and the summary of a completed configuration
+            self._log_file.truncate(min(log_end, self._log_file.tell()))
+            self._log_file.seek(0, os.SEEK_END)
+        self._sched_file = open(self._path, 'w')
+    
+    def _format_point(self, point_i):
+        return format_sched_row(self._c_to_tr_ratio_set[point_i], self._num_feasible[point_i],
+                                self._num_sets[point_i], self._ci)
+    
+    def add_block(self, point_i, block_i, num_feasible):
+        self._num_sets[point_i] += min(BLOCK_SIZE, self._num_tasksets - block_i * BLOCK_SIZE)
+        self._num_feasible[point_i] += num_feasible
+        
+        if self._num_sets[point_i] == self._num_tasksets:
+            self._done[point_i] = True
+            self._sched_file.write(self._format_point(point_i))
+    
+    def add_point(self, point_i, num_feasible, num_sets = None):
+        '''
+        Complete a ratio point at once (e.g., loaded from the result cache), by default with all its tasksets
+        '''
+        self._num_sets[point_i] = self._num_tasksets if num_sets is None else num_sets
+        self._num_feasible[point_i] = num_feasible
+        self._done[point_i] = True
+        self._sched_file.write(self._format_point(point_i))
+    
+    def get_points(self):
+        '''
+        Indexes of the completed ratio points, their number of feasible tasksets and of tasksets
+        '''
+        points = np.flatnonzero(self._done)
+        return points.tolist(), self._num_feasible[points].tolist(), self._num_sets[points].tolist()
+    
+    def add_log(self, chunk, log):
+        '''
+        Append the log of a chunk (if any) after a header naming its ratio point and tasksets
+        '''
+        if not log:
+            return
+        
+        if chunk.point_i is None:
+            point = 'all ratio points'
+        else:
+            point = 'ratio point {} ({:.5f})'.format(chunk.point_i, chunk.c_to_tr_ratio)
+        self._log_file.write('Chunk: {}, tasksets [{}, {})\n'.format(point, chunk.first, chunk.last))
+        self._log_file.write(log)
+    
+    def flush(self):
+        self._log_file.flush()
+        self._sched_file.flush()
+    
+    def sync_log(self):
+        '''
+        Durably write the logs added so far, return the end of the log file
+        '''
+        self._log_file.flush()
+        os.fsync(self._log_file.fileno())
+        return self._log_file.tell()
+    
+    def close(self):
+        '''
+        Complete the outputs, return the completed ratio points and their feasibility ratio
+        '''
+        points = np.flatnonzero(self._done)
+        feasible = self._num_feasible[points] / self._num_sets[points]
+        
+        self._log_file.write(str(feasible))
+        self._log_file.close()
+        self._sched_file.close()
+        
+        # Write output file for PFG, replacing the streamed file at once:
+        # readers never see a truncated file
+        with open(self._path + '.tmp', 'w') as s_file:
+            s_file.writelines(self._format_point(point_i) for point_i in points)
+        os.replace(self._path + '.tmp', self._path)
+        
+        return self._c_to_tr_ratio_set[points], feasible
+
+
+def load_results(configs):
+    '''
+    Ratio points written so far for each configuration (curves are partial while
+    a run is in progress), lines still being written are skipped
+    '''
+    results = {}
+    for num_tasks, num_inters in configs:
+        try:
+            with open(get_sched_path(num_tasks, num_inters)) as s_file:
+                points = sorted(tuple(float(field) for field in line.split(',')[:2])
+                                for line in s_file if line.endswith('\n') and line.count(',') in (1, 4))
+        except FileNotFoundError:
+            continue
+        
+        if points:
+            c_to_tr_ratio_set, feasible = zip(*points)
+            results[(num_tasks, num_inters)] = (np.array(c_to_tr_ratio_set), np.array(feasible))
+    
+    return results
+
+
+def write_profile(profile, wall_time, name = 'profile'):
+    '''
+    Write the phase timers and counters of each configuration, and their total
+    '''
+    total_phases = PhaseStats()
+    total_stats = sys.FeasibilityStats()
+    configs = {}
+    for (num_tasks, num_inters), (phases, stats) in sorted(profile.items()):
+        total_phases.merge(phases)
+        total_stats.merge(stats)
+        configs['t_{}_i_{}'.format(num_tasks, num_inters)] = phases.to_dict(stats)
+    
+    report = {
+        'wall_time' : wall_time,
+        'total'     : total_phases.to_dict(total_stats),
+        'configs'   : configs
+    }
+    with open('{}/{}.json'.format(OUT_DIR, name), 'w') as p_file:
+        json.dump(report, p_file, indent = 2)
+    
+    return total_phases
+
+
+def plot_results(results):
+    '''
+    For each number of tasks, generate a different plot to show the
+    feasibility ratio while varying the number of Interconnects
+    '''
+    # Imported here, the workers only need the analysis
+    import matplotlib.pyplot as plt
+    
+    for num_tasks in sorted(set(num_tasks for num_tasks, _ in results)):
+        plt.figure()
+        plt.title('{} Tasks'.format(num_tasks))
+        for num_inters in sorted(num_inters for n_t, num_inters in results if n_t == num_tasks):
+            c_to_tr_ratio_set, feasible = results[(num_tasks, num_inters)]
+            plt.plot(c_to_tr_ratio_set, feasible, label = '{} Int.'.format(num_inters))
+             
+        plt.legend()
+        plt.savefig('{}/plot_t_{}.pdf'.format(OUT_DIR, num_tasks))
+        plt.close()
+
+
+def validate_options(sweep, store = False, shard = None, ci_width = None, verbose = False):
+    '''
+    Check that the options of a run can be combined: the result store requires the grid sweep,
+    the precision budget (ci_width) is supported by the grid and adaptive sweeps without result store
+    and shards, shards (and their merge) by the grid and bisect sweeps without result store and logs
+    '''
+    if sweep not in (SWEEP_GRID, SWEEP_BISECT, SWEEP_ADAPTIVE):
+        raise ValueError('Unknown sweep mode: {}'.format(sweep))
+    if store and sweep != SWEEP_GRID:
+        raise ValueError('The result store requires the {} sweep'.format(SWEEP_GRID))
+    if ci_width is not None and (store or shard is not None or sweep == SWEEP_BISECT):
+        raise ValueError('The precision budget does not support the result store, shards and the {} sweep'.format(
+                         SWEEP_BISECT))
+    if shard is not None and (store or verbose or sweep == SWEEP_ADAPTIVE):
+        raise ValueError('Sharded runs do not support the result store, the logs and the {} sweep'.format(
+                         SWEEP_ADAPTIVE))
+
+
+def get_chunks_runner(sweep, num_tasks, num_inters, num_tasksets, c_to_tr_points, chunk_size = CHUNK_SIZE,
+                      done = frozenset(), store_root = None, shard = None, ci_width = None):
+    '''
+    Chunks of a configuration (of a shard, if not None, of the first round for the adaptive sweep
+    and with a precision budget, ci_width) and the function running them for the given sweep mode.
+    The options are checked by validate_options
+    '''
+    validate_options(sweep, store_root is not None, shard, ci_width)
+    first_blocks = None if ci_width is None else 1
+    if sweep == SWEEP_GRID:
+        return gen_chunks(num_tasks, num_inters, num_tasksets, c_to_tr_points, chunk_size, done, shard,
+                          first_blocks), functools.partial(run_chunk, store_root = store_root)
+    elif sweep == SWEEP_ADAPTIVE:
+        return gen_adaptive_chunks(num_tasks, num_inters, num_tasksets, c_to_tr_points, None, chunk_size, done,
+                                   first_blocks), run_chunk
+    else:
+        return gen_bisect_chunks(num_tasks, num_inters, num_tasksets, c_to_tr_points, chunk_size, done, shard), \
+                functools.partial(run_bisect_chunk, c_to_tr_points = c_to_tr_points)
+    
+
+@functools.lru_cache(maxsize = None)
+def get_code_version():
+    '''
+    Hash of the code the results depend on: the analysis, topology, workload and taskset
+    generation modules, and the functions choosing the ratio points and generating and analysing
+    the tasksets of the chunks
+    '''
+    sources = hashlib.sha256()
+    for obj in (sys, topo, work, taskgen, get_c_to_tr_ratio_set, get_block_rng, run_chunk,
+                find_critical_points, run_bisect_chunk, get_block_records, get_adaptive_levels,
+                get_adaptive_tol, refine_points, gen_adaptive_chunks, wilson_interval, get_block_sizes,
+                get_stop_blocks, gen_sampling_chunks):
+        sources.update(inspect.getsource(obj).encode())
+    
+    return sources.hexdigest()
+
+
+def get_cache_params(num_tasks, num_inters, num_tasksets, c_to_tr_points, seed, sweep, ci_width = None):
+    '''
+    Full set of parameters determining the results of a configuration, the cache key
+    '''
+    params = {
+        'num_tasks'         : num_tasks,
+        'num_inters'        : num_inters,
+        'num_tasksets'      : num_tasksets,
+        'c_to_tr_points'    : c_to_tr_points,
+        'c_to_tr_ratio_min' : C_TO_TR_RATIO_MIN,
+        'c_to_tr_ratio_max' : C_TO_TR_RATIO_MAX,
+        'min_period'        : int(TASK_PERIOD_MIN),
+        'max_period'        : int(TASK_PERIOD_MAX),
+        'utilization'       : UTILIZATION,
+        'ordering'          : ORDERING,
+        'seed'              : seed,
+        'block_size'        : BLOCK_SIZE,
+        'sweep'             : sweep,
+        'code_version'      : get_code_version()
+    }
+    if sweep == SWEEP_ADAPTIVE:
+        params['adaptive_start_levels'] = ADAPTIVE_START_LEVELS
+        params['adaptive_tol'] = ADAPTIVE_TOL
+    if ci_width is not None:
+        params['ci_width'] = ci_width
+        params['ci_z'] = CI_Z
+    
+    return params
+
+
+def gen_next_chunks(sweep, stream, num_tasks, num_inters, num_tasksets, c_to_tr_points, chunk_size = CHUNK_SIZE,
+                    done = frozenset(), ci_width = None):
+    '''
+    Chunks of the next round of a configuration given its results so far (stream, and the
+    blocks done with a precision budget, ci_width): the ratio points not precise enough are
+    sampled further, then the adaptive sweep refines the completed points. None once done
+    '''
+    c_to_tr_ratio_set = get_c_to_tr_ratio_set(get_grid_points(sweep, c_to_tr_points))
+    while True:
+        if ci_width is not None:
+            chunks = gen_sampling_chunks(stream, num_tasks, num_inters, num_tasksets, c_to_tr_ratio_set, ci_width,
+                                         chunk_size, done)
+            if chunks:
+                return chunks
+        if sweep != SWEEP_ADAPTIVE:
+            return []
+        
+        points, num_feasible, num_sets = stream.get_points()
+        new_points = refine_points(points, np.array(num_feasible) / np.array(num_sets),
+                                   get_adaptive_tol(num_tasksets, ci_width))
+        if not new_points:
+            return []
+        
+        # With a precision budget, the first blocks of the new points may have been done
+        # by a previous run: sample them further in the next iteration
+        chunks = gen_adaptive_chunks(num_tasks, num_inters, num_tasksets, c_to_tr_points, new_points, chunk_size,
+                                     done, None if ci_width is None else 1)
+        if chunks or ci_width is None:
+            return chunks
+
+
+def get_config_store(num_tasks, num_inters, c_to_tr_ratio_set, num_tasksets, resume = False):
+    '''
+    Result store of a configuration: the one of the interrupted run if resuming, else a new one
+    '''
+    path = sto.get_config_path(STORE_DIR, num_tasks, num_inters)
+    if resume and os.path.exists(os.path.join(path, 'meta.json')):
+        return sto.ConfigStore(path, 'r+')
+    
+    return sto.ConfigStore.create(path, num_tasks, num_inters, c_to_tr_ratio_set, num_tasksets, BLOCK_SIZE)
+
+
+def test_bin_fixed_config(num_tasks, num_inters, num_tasksets, c_to_tr_points, verbose, seed = SEED,
+                          sweep = SWEEP_GRID, profile = False, store = False, ci_width = None):
+    '''
+    Run the experiment of a single configuration in the current process, with profile
+    the time spent in each phase is written in the profile summary, with store the
+    results of each taskset are saved in the result store. With ci_width, the tasksets
+    of each ratio point are sampled until its confidence interval is at most ci_width wide
+    (num_tasksets at most), and the interval is written in the CSV file
+    '''
+    validate_options(sweep, store, ci_width = ci_width, verbose = verbose)
+    print('Start\t tasks: {: <10} inters: {: <10}'.format(num_tasks, num_inters))
+    start = time.perf_counter()
+    phases = PhaseStats()
+    stats = sys.FeasibilityStats()
+    
+    # Feasibility indexes for each bus loading (transaction density) factor
+    c_to_tr_ratio_set = get_c_to_tr_ratio_set(get_grid_points(sweep, c_to_tr_points))
+    stream = ResultStream(num_tasks, num_inters, c_to_tr_ratio_set, num_tasksets, ci = ci_width is not None)
+    
+    chunks, runner = get_chunks_runner(sweep, num_tasks, num_inters, num_tasksets, c_to_tr_points,
+                                       store_root = STORE_DIR if store else None, ci_width = ci_width)
+    config_store = None
+    if store:
+        config_store = get_config_store(num_tasks, num_inters, c_to_tr_ratio_set, num_tasksets)
+    
+    # With a precision budget, the ratio points are completed by gen_next_chunks
+    block_feasible = {}
+    while chunks:
+        for chunk in chunks:
+            result = runner(chunk, seed = seed, verbose = verbose, profile = profile)
+            for record in get_block_records(result):
+                block_feasible[(num_tasks, num_inters, record['point'], record['block'])] = record['num_feasible']
+                if ci_width is None:
+                    stream.add_block(record['point'], record['block'], record['num_feasible'])
+                if config_store is not None:
+                    config_store.mark_written(record['point'], record['block'])
+            if config_store is not None:
+                config_store.flush()
+            stream.add_log(result.chunk, result.log)
+            stream.flush()
+            stats.merge(result.stats)
+            if profile:
+                phases.merge(result.phases)
+        
+        chunks = gen_next_chunks(sweep, stream, num_tasks, num_inters, num_tasksets, c_to_tr_points,
+                                 done = block_feasible, ci_width = ci_width)
+    
+    c_to_tr_ratio_set, feasible = stream.close()
+    
+    if profile:
+        print(write_profile({(num_tasks, num_inters) : (phases, stats)}, time.perf_counter() - start))
+        
+    print('Done\t tasks: {: <10} inters: {: <10}'.format(num_tasks, num_inters))
+    return c_to_tr_ratio_set, feasible
+
+
+def get_active_configs():
     
     #####################################################
     num_tasks_l = [4, 8, 16, 24]
@@ -128,43 +1037,366 @@ def parametric_workload_run_mp(num_tasksets = 1000, c_to_tr_points = 100, verbos
     active[(24, 8)] = True
     #########################################
     
-    num_cores = os.cpu_count()
+    return [config for config in sorted(active) if active[config]]
+
+
+def parametric_workload_run_mp(num_tasksets = 1000, c_to_tr_points = 100, verbose = False,
+                               seed = SEED, chunk_size = CHUNK_SIZE, num_workers = None, resume = False,
+                               sweep = SWEEP_GRID, profile = False, status_interval = STATUS_INTERVAL,
+                               store = False, cache = True, cache_size = CACHE_SIZE, shard = None, ci_width = None):
+    '''
+    Run the experiment of all the active configurations over a pool of worker processes,
+    loading the cached ones and, with resume, skipping the blocks in the journal
+    '''
+    start = time.perf_counter()
+    configs = get_active_configs()
+    
+    validate_options(sweep, store, shard, ci_width, verbose)
+    
+    if num_workers is None:
+        num_workers = os.cpu_count()
     #########################################
     
     # Make data output directory
     os.makedirs(OUT_DIR, exist_ok = True)
     
+    params = {
+        'num_tasksets'      : num_tasksets,
+        'c_to_tr_points'    : c_to_tr_points,
+        'seed'              : seed,
+        'block_size'        : BLOCK_SIZE,
+        'configs'           : [list(config) for config in configs],
+        'sweep'             : sweep
+    }
+    if ci_width is not None:
+        params['ci_width'] = ci_width
+    if store:
+        params['store'] = True
+    if shard is not None:
+        params['shard'] = list(shard)
+        params['code_version'] = get_code_version()
+    journal = jrn.Journal(get_journal_path(shard), params, resume)
+    
+    # Outputs of each configuration, written while the run is in progress (by the merge if sharded).
+    # When resuming, the logs of the blocks in the journal are kept: each record holds the end of
+    # the log of its configuration once the log of its chunk was written (log_end)
+    c_to_tr_ratio_set = get_c_to_tr_ratio_set(get_grid_points(sweep, c_to_tr_points))
+    log_ends = {}
+    for record in journal.records:
+        if 'log_end' in record:
+            config = (record['num_tasks'], record['num_inters'])
+            log_ends[config] = max(log_ends.get(config, 0), record['log_end'])
+    streams = {}
+    if shard is None:
+        streams = {config : ResultStream(*config, c_to_tr_ratio_set, num_tasksets, ci = ci_width is not None,
+                                         append = resume, log_end = log_ends.get(config, 0))
+                   for config in configs}
+    
+    # Configurations loaded from the cache, not when the logs or the result store
+    # must be produced (the cache only keeps the number of feasible tasksets)
+    result_cache = cch.ResultCache(CACHE_DIR, cache_size) if cache and shard is None else None
+    cache_params = {config : get_cache_params(*config, num_tasksets, c_to_tr_points, seed, sweep, ci_width)
+                    for config in configs}
+    cached = set()
+    if result_cache is not None and not verbose and not store:
+        for config in configs:
+            entry = result_cache.get(cache_params[config])
+            if entry is not None:
+                cached.add(config)
+                for point_i, num_feasible, num_sets in zip(entry['points'], entry['num_feasible'], entry['num_sets']):
+                    streams[config].add_point(point_i, num_feasible, num_sets)
+    
+    # Result store of each configuration, blocks are written by the workers and marked here
+    stores = {}
+    if store:
+        stores = {config : get_config_store(*config, c_to_tr_ratio_set, num_tasksets, resume) for config in configs}
+    
+    # Feasible tasksets of each (num_tasks, num_inters, point_i, block_i) block,
+    # blocks recorded more than once (e.g., partially journaled) are counted once.
+    # With a precision budget, the ratio points are completed by gen_next_chunks
+    block_feasible = {}
+    
+    def add_record(record):
+        config = (record['num_tasks'], record['num_inters'])
+        key = (record['num_tasks'], record['num_inters'], record['point'], record['block'])
+        if config not in cached and key not in block_feasible:
+            block_feasible[key] = record['num_feasible']
+            if config in streams and ci_width is None:
+                streams[config].add_block(record['point'], record['block'], record['num_feasible'])
+    
+    # Blocks already done (if resuming)
+    for record in journal.records:
+        add_record(record)
+    
+    # Split each configuration in small chunks, the largest configurations
+    # are submitted first to balance the load among the workers
+    chunks = []
+    for num_tasks, num_inters in sorted(configs, key = lambda config: config[0], reverse = True):
+        if (num_tasks, num_inters) in cached:
+            continue
+        config_chunks, runner = get_chunks_runner(sweep, num_tasks, num_inters, num_tasksets, c_to_tr_points,
+                                                  chunk_size, block_feasible, STORE_DIR if store else None, shard,
+                                                  ci_width)
+        chunks.extend(config_chunks)
+    
+    pending = {config : 0 for config in configs}
+    stats = sys.FeasibilityStats()
+    profile_stats = {config : (PhaseStats(), sys.FeasibilityStats()) for config in configs}
     results = {}
-    # Launch an experiment for each configuration
-    with fts.ProcessPoolExecutor(max_workers = num_cores) as executor:
-        for num_tasks in num_tasks_l:
-            for num_inters in num_inters_l:
-                if active[(num_tasks, num_inters)]:
-                    future = executor.submit(test_bin_fixed_config,
-                                            num_tasks, num_inters,
-                                            num_tasksets, c_to_tr_points, verbose)
-                    results[(num_tasks, num_inters)] = future
+    
+    def config_done(config):
+        if shard is not None:
+            print('Done\t tasks: {: <10} inters: {: <10} shard: {}/{}'.format(*config, *shard))
+            return
+        if result_cache is not None and config not in cached:
+            points, num_feasible, num_sets = streams[config].get_points()
+            result_cache.put(cache_params[config], {'points' : points, 'num_feasible' : num_feasible,
+                                                    'num_sets' : num_sets})
+        results[config] = streams[config].close()
+        print('{}\t tasks: {: <10} inters: {: <10}'.format('Cached' if config in cached else 'Done', *config))
+    
+    # Chunks are dynamically scheduled over the pool
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(journal)
+        executor = stack.enter_context(fts.ProcessPoolExecutor(max_workers = num_workers))
+        
+        # Workers report their progress through a queue served by a manager process
+        progress_queue = None
+        monitor = None
+        if status_interval:
+            progress_queue = stack.enter_context(mp.Manager()).Queue()
+            totals = {config : 0 for config in configs}
+            for chunk in chunks:
+                totals[(chunk.num_tasks, chunk.num_inters)] += chunk.last - chunk.first
+            monitor = ProgressMonitor(progress_queue, totals)
+        
+        not_done = set()
+        started = set()
+        
+        def submit(chunks):
+            for chunk in chunks:
+                config = (chunk.num_tasks, chunk.num_inters)
+                if config not in started:
+                    print('Start\t tasks: {: <10} inters: {: <10}'.format(*config))
+                    started.add(config)
+                pending[config] += 1
+                not_done.add(executor.submit(runner, chunk, seed = seed, verbose = verbose, profile = profile,
+                                             progress_queue = progress_queue))
+        
+        def round_done(config):
+            # The adaptive sweep refines the results of the round, the configuration is done otherwise
+            next_chunks = []
+            if config in streams and config not in cached:
+                next_chunks = gen_next_chunks(sweep, streams[config], *config, num_tasksets, c_to_tr_points,
+                                              chunk_size, block_feasible, ci_width)
+            if not next_chunks:
+                config_done(config)
+                return
+            
+            if monitor is not None:
+                monitor.add_total(config, sum(chunk.last - chunk.first for chunk in next_chunks))
+            submit(next_chunks)
+        
+        submit(chunks)
+        
+        # Configurations loaded from the cache or whose round was completed by a previous run
+        for config in configs:
+            if pending[config] == 0:
+                round_done(config)
+        
+        last_status = time.monotonic()
+        while not_done:
+            done, not_done = fts.wait(not_done, timeout = status_interval or None, return_when = fts.FIRST_COMPLETED)
+            
+            if monitor is not None and time.monotonic() - last_status >= status_interval:
+                monitor.drain()
+                print(monitor)
+                last_status = time.monotonic()
+            
+            for future in done:
+                result = future.result()
+                chunk = result.chunk
+                config = (chunk.num_tasks, chunk.num_inters)
+                records = get_block_records(result)
+                if store:
+                    config_store = stores[config]
+                    for record in records:
+                        config_store.mark_written(record['point'], record['block'])
+                    config_store.flush()
+                # The log of the chunk is written before its blocks are journaled:
+                # a journaled block never misses its log
+                if config in streams:
+                    streams[config].add_log(chunk, result.log)
+                    log_end = streams[config].sync_log()
+                    for record in records:
+                        record['log_end'] = log_end
+                journal.append(records)
+                for record in records:
+                    add_record(record)
+                stats.merge(result.stats)
+                
+                if profile:
+                    profile_stats[config][0].merge(result.phases)
+                    profile_stats[config][1].merge(result.stats)
+                if config in streams:
+                    streams[config].flush()
+                
+                pending[config] -= 1
+                if pending[config] == 0:
+                    round_done(config)
+    
+    plot_results(results)
+    
+    print(stats)
+    if profile:
+        print(write_profile(profile_stats, time.perf_counter() - start, get_shard_name('profile', shard)))
+    print('All DONE')
 
-    for num_tasks in num_tasks_l:
-        # For each number of tasks, generate a different plot to show the
-        # feasibility ratio while varying the number of Interconnects
-        plt.figure()
-        plt.title('{} Tasks'.format(num_tasks))
-        for num_inters in num_inters_l:
-            if active[(num_tasks, num_inters)]:
-                future = results[(num_tasks, num_inters)]
-                c_to_tr_ratio_set, feasible = future.result()
-                plt.plot(c_to_tr_ratio_set, feasible, label = '{} Int.'.format(num_inters))
-             
-        plt.legend()
-        plt.savefig('{}/plot_t_{}.pdf'.format(OUT_DIR, num_tasks))
+
+def merge_shards(num_shards, cache = True, cache_size = CACHE_SIZE):
+    '''
+    Combine the journals of the num_shards shards of a run into its outputs (sched CSV and log
+    files, plots), identical to the ones of a run with the same parameters on a single node.
+    The merged results are added to the result cache if the shards ran the current code
+    '''
+    params = None
+    records = []
+    for index in range(num_shards):
+        path = get_journal_path((index, num_shards))
+        shard_params, shard_records = jrn.Journal.read(path)
+        if shard_params is None or shard_params.pop('shard') != [index, num_shards] \
+                or params not in (None, shard_params):
+            raise RuntimeError('Journal {} belongs to a run with different parameters!'.format(path))
+        params = shard_params
+        records.extend(shard_records)
+    
+    if params['block_size'] != BLOCK_SIZE:
+        raise RuntimeError('The shards ran with a different block size!')
+    
+    configs = [tuple(config) for config in params['configs']]
+    num_tasksets = params['num_tasksets']
+    c_to_tr_points = params['c_to_tr_points']
+    num_blocks = int(np.ceil(num_tasksets / BLOCK_SIZE))
+    
+    # Blocks recorded more than once (e.g., by a resumed shard) are counted once
+    block_feasible = {}
+    for record in records:
+        key = (record['num_tasks'], record['num_inters'], record['point'], record['block'])
+        block_feasible.setdefault(key, record['num_feasible'])
+    
+    missing = [(*config, point_i, block_i) for config in configs
+               for point_i in range(c_to_tr_points) for block_i in range(num_blocks)
+               if (*config, point_i, block_i) not in block_feasible]
+    if missing:
+        raise RuntimeError('{} blocks are missing (e.g., {}), are all the shards done?'.format(len(missing),
+                                                                                               missing[0]))
+    
+    os.makedirs(OUT_DIR, exist_ok = True)
+    result_cache = None
+    if cache and params['code_version'] == get_code_version():
+        result_cache = cch.ResultCache(CACHE_DIR, cache_size)
+    
+    c_to_tr_ratio_set = get_c_to_tr_ratio_set(c_to_tr_points)
+    results = {}
+    for config in configs:
+        stream = ResultStream(*config, c_to_tr_ratio_set, num_tasksets)
+        for point_i in range(c_to_tr_points):
+            for block_i in range(num_blocks):
+                stream.add_block(point_i, block_i, block_feasible[(*config, point_i, block_i)])
         
+        if result_cache is not None:
+            points, num_feasible, num_sets = stream.get_points()
+            result_cache.put(get_cache_params(*config, num_tasksets, c_to_tr_points, params['seed'], params['sweep']),
+                             {'points' : points, 'num_feasible' : num_feasible, 'num_sets' : num_sets})
+        results[config] = stream.close()
+        print('Merged\t tasks: {: <10} inters: {: <10}'.format(*config))
+    
+    plot_results(results)
     print('All DONE')
 
 
+def parse_shard(text):
+    '''
+    Shard (index, count) from its 'I/N' command line form
+    '''
+    try:
+        index, count = (int(field) for field in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError('shard must be I/N, e.g., 0/4')
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError('shard index must be in [0, N)')
+    
+    return index, count
+
+
+def parse_num_shards(text):
+    '''
+    Number of shards of a run to merge, at least one
+    '''
+    try:
+        num_shards = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError('number of shards must be an integer')
+    if num_shards < 1:
+        raise argparse.ArgumentTypeError('number of shards must be at least 1')
+    
+    return num_shards
+
+
 ###################################################################################################
 
 if __name__ == '__main__':
-    np.random.seed(100)
-    parametric_workload_run_mp(num_tasksets = 50000, c_to_tr_points = 100, verbose = False)
-
+    parser = argparse.ArgumentParser(description = 'Synthetic workloads experiment')
+    parser.add_argument('--resume', action = 'store_true',
+                        help = 'skip the work recorded in the journal of an interrupted run')
+    parser.add_argument('--sweep', choices = [SWEEP_GRID, SWEEP_BISECT, SWEEP_ADAPTIVE], default = SWEEP_GRID,
+                        help = 'grid: new tasksets for each ratio point, '
+                               'bisect: bisect the critical ratio point of each taskset, '
+                               'adaptive: refine the ratio points only where the curve changes')
+    parser.add_argument('--profile', action = 'store_true',
+                        help = 'time the phases of the workers and write a summary in {}/profile.json'.format(OUT_DIR))
+    parser.add_argument('--status-interval', type = float, default = STATUS_INTERVAL,
+                        help = 'seconds between two progress lines, 0 to disable them')
+    parser.add_argument('--store', action = 'store_true',
+                        help = 'save the response times of each taskset in {} (grid sweep only)'.format(STORE_DIR))
+    parser.add_argument('--no-cache', action = 'store_true',
+                        help = 'compute all the configurations, without reading or updating the result cache')
+    parser.add_argument('--cache-size', type = float, default = CACHE_SIZE / 2**20,
+                        help = 'size bound of the result cache [MiB]')
+    parser.add_argument('--invalidate', type = int, nargs = 2, action = 'append', default = [],
+                        metavar = ('NUM_TASKS', 'NUM_INTERS'),
+                        help = 'remove the cached results of a configuration (can be repeated)')
+    parser.add_argument('--clear-cache', action = 'store_true',
+                        help = 'remove all the cached results before running')
+    parser.add_argument('--ci-width', type = float, metavar = 'WIDTH',
+                        help = 'sample each bus load value until the 95%% Wilson interval of its schedulability ratio '
+                               'is at most WIDTH wide, the number of tasksets becomes the maximum (grid and adaptive '
+                               'sweeps). The interval is checked after each block of {} tasksets, hence each value '
+                               'uses at least {} tasksets, and its coverage holds for each check, not for the whole '
+                               'sequence of checks'.format(BLOCK_SIZE, BLOCK_SIZE))
+    parser.add_argument('--shard', type = parse_shard, metavar = 'I/N',
+                        help = 'only run the I-th of N shards of the experiment (I in [0, N)), '
+                               'e.g., on different nodes, then merge them with --merge N')
+    parser.add_argument('--merge', type = parse_num_shards, metavar = 'N',
+                        help = 'write the outputs from the journals of the N shards in {} and exit'.format(OUT_DIR))
+    parser.add_argument('--plot-partial', action = 'store_true',
+                        help = 'plot the results written so far (e.g., by a run in progress) and exit')
+    args = parser.parse_args()
+    
+    if args.clear_cache or args.invalidate:
+        invalid = set(tuple(config) for config in args.invalidate)
+        removed = cch.ResultCache(CACHE_DIR).invalidate(
+            None if args.clear_cache else lambda params: (params['num_tasks'], params['num_inters']) in invalid
+        )
+        print('Removed {} cached results'.format(removed))
+    
+    if args.plot_partial:
+        plot_results(load_results(get_active_configs()))
+    elif args.merge is not None:
+        merge_shards(args.merge, cache = not args.no_cache, cache_size = int(args.cache_size * 2**20))
+    else:
+        parametric_workload_run_mp(num_tasksets = 50000, c_to_tr_points = 100, verbose = False,
+                                   resume = args.resume, sweep = args.sweep, profile = args.profile,
+                                   status_interval = args.status_interval, store = args.store,
+                                   cache = not args.no_cache, cache_size = int(args.cache_size * 2**20),
+                                   shard = args.shard, ci_width = args.ci_width)
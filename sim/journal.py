@@ -0,0 +1,129 @@
+'''
+Artifact evaluation code for the paper:
+Francesco Restuccia, Marco Pagani, Alessandro Biondi, Mauro Marinoni, and Giorgio Buttazzo,
+"Modeling and Analysis of Bus Contention for Hardware Accelerators in FPGA SoCs",
+In Proceedings of the 32nd Euromicro Conference on Real-Time Systems (ECRTS 2020), July 7-10, 2020.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+@author: Marco Pag
+'''
+
+
+###################################################################################################
+
+import os
+import json
+
+###################################################################################################
+
+class Journal(object):
+    '''
+    Append-only, line-based journal of completed blocks of tasksets.
+    The first line holds the parameters of the run, then each line records a block.
+    Each record is written with a single append followed by fsync, a truncated
+    last line (e.g., after a crash) is discarded when the journal is reopened.
+    A journal without a complete parameters line (e.g., empty) is started afresh
+    '''
+    def __init__(self, path, params, resume = False):
+        self._path = path
+        self._params = params
+        self._records = []
+        
+        if not (resume and os.path.exists(path) and self._load()):
+            with open(path, 'w') as j_file:
+                j_file.write(json.dumps(params, sort_keys = True) + '\n')
+                j_file.flush()
+                os.fsync(j_file.fileno())
+        
+        self._file = open(path, 'a')
+        
+    def _load(self):
+        '''
+        Load the records of an existing journal, False if it has no valid parameters line
+        '''
+        with open(self._path, 'rb') as j_file:
+            data = j_file.read()
+        
+        # Drop a partially written last line
+        valid_len = data.rfind(b'\n') + 1
+        if valid_len < len(data):
+            with open(self._path, 'r+b') as j_file:
+                j_file.truncate(valid_len)
+        
+        # The parameters line is written (and synced) before any record,
+        # if it is missing or truncated no block was recorded
+        header_len = data.find(b'\n') + 1
+        try:
+            params = json.loads(data[:header_len]) if header_len > 0 else None
+        except ValueError:
+            params = None
+        if not isinstance(params, dict):
+            return False
+        
+        params, self._records = Journal._parse(data[:valid_len])
+        if params != json.loads(json.dumps(self._params, sort_keys = True)):
+            raise RuntimeError('Journal {} belongs to a run with different parameters!'.format(self._path))
+        return True
+    
+    @staticmethod
+    def _parse(data):
+        '''
+        Parameters and records of the complete lines of a journal, (None, []) if empty
+        '''
+        lines = data[:data.rfind(b'\n') + 1].decode().splitlines()
+        if not lines:
+            return None, []
+        
+        return json.loads(lines[0]), [json.loads(line) for line in lines[1:]]
+    
+    @staticmethod
+    def read(path):
+        '''
+        Parameters and records of a journal, without modifying it (e.g., written by another run)
+        '''
+        with open(path, 'rb') as j_file:
+            return Journal._parse(j_file.read())
+    
+    def append(self, records):
+        '''
+        Durably append a list of records (dictionaries)
+        '''
+        if not records:
+            return
+        
+        self._file.write(''.join(json.dumps(record, sort_keys = True) + '\n' for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._records.extend(records)
+        
+    def close(self):
+        self._file.close()
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+    
+    @property
+    def records(self):
+        return self._records
+    
+    @property
+    def params(self):
+        return self._params
+
+###################################################################################################
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,242 @@
+'''
+Artifact evaluation code for the paper:
+Francesco Restuccia, Marco Pagani, Alessandro Biondi, Mauro Marinoni, and Giorgio Buttazzo,
+"Modeling and Analysis of Bus Contention for Hardware Accelerators in FPGA SoCs",
+In Proceedings of the 32nd Euromicro Conference on Real-Time Systems (ECRTS 2020), July 7-10, 2020.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+@author: Marco Pag
+'''
+
+
+###################################################################################################
+
+import os
+import numpy as np
+import concurrent.futures as fts
+
+import axi_system as sys
+
+###################################################################################################
+
+INTER_PARAMS = ('phi', 'd_addr', 'd_data', 'd_bresp', 't_hold_addr', 't_hold_data', 't_hold_bresp')
+
+###################################################################################################
+
+def get_score(system):
+    '''
+    Placement objective (to be maximized): minus the number of deadline misses,
+    then the minimum slack relative to the period
+    '''
+    resp_times = system.get_resp_times()
+    tasks = system.workload.tasks
+    slacks = [(task.period - resp_time) / task.period for task, resp_time in zip(tasks, resp_times)]
+    
+    return (-int(sum(slack < 0 for slack in slacks)), float(min(slacks)))
+
+
+def eval_placement(topology, tasks_adj):
+    return get_score(sys.System(topology.with_placement(tasks_adj)))
+
+
+# Topology used by the evaluation workers
+_worker_topology = None
+
+def _init_worker(topology):
+    global _worker_topology
+    _worker_topology = topology
+
+def _eval_worker(tasks_adj):
+    return eval_placement(_worker_topology, tasks_adj)
+
+###################################################################################################
+
+class PlacementSearch(object):
+    '''
+    Local search (steepest ascent with random restarts) of the placement of the HW-tasks
+    over the Interconnects of a topology maximizing get_score(), pruned by an isolation bound
+    '''
+    def __init__(self, topology, num_workers = None, max_iters = 100, restarts = 0,
+                 allow_empty = False, seed = None):
+        if not allow_empty and topology.num_tasks < topology.num_inters:
+            raise ValueError('Cannot place {} tasks on {} Interconnects without empty ones'.format(
+                             topology.num_tasks, topology.num_inters))
+        
+        self._topology = topology
+        self._workload = topology.workload
+        self._num_workers = os.cpu_count() if num_workers is None else num_workers
+        self._max_iters = max_iters
+        self._restarts = restarts
+        self._allow_empty = allow_empty
+        self._rng = np.random.default_rng(seed)
+        
+        self._scores = {}
+        self.num_evaluated = 0
+        self.num_cached = 0
+        self.num_pruned = 0
+        
+        # Placements are interchangeable under tree automorphisms
+        # only if all the Interconnects have the same parameters
+        inters_params = set(tuple(getattr(inter, name) for name in INTER_PARAMS) for inter in self._workload.inters)
+        self._uniform_inters = len(inters_params) == 1
+        
+        # Bound (response time in isolation) of each task on each Interconnect, with the parameters
+        # of that Interconnect: slack relative to the period
+        system = sys.System(topology)
+        self._slack_bounds = []
+        for task_i, task in enumerate(self._workload.tasks):
+            bounds = []
+            for inter_j in range(topology.num_inters):
+                d_iso = task.c_time \
+                        + task.trans_r * system._get_d_nocont_r(inter_j, task_i) \
+                        + task.trans_w * system._get_d_nocont_w(inter_j, task_i)
+                bounds.append((task.period - d_iso) / task.period)
+            self._slack_bounds.append(bounds)
+    
+    def get_canonical(self, tasks_adj):
+        '''
+        Canonical form of a placement: equal for placements that are
+        mapped one onto the other by swapping isomorphic subtrees
+        '''
+        if not self._uniform_inters:
+            return tuple(tasks_adj)
+        
+        tasks_by_inter = [[] for _ in range(self._topology.num_inters)]
+        for task_i, inter_i in enumerate(tasks_adj):
+            tasks_by_inter[inter_i].append(task_i)
+        
+        def encode(inter_j):
+            children = self._topology.get_inters_above_dc(inter_j)
+            return (tuple(tasks_by_inter[inter_j]), tuple(sorted(encode(inter_c) for inter_c in children)))
+        
+        return encode(0)
+    
+    def get_bound(self, tasks_adj):
+        '''
+        Upper bound of the score of a placement
+        '''
+        misses = 0
+        min_slack = np.inf
+        for task_i, inter_i in enumerate(tasks_adj):
+            slack = self._slack_bounds[task_i][inter_i]
+            misses += slack < 0
+            min_slack = min(min_slack, slack)
+        
+        return (-misses, min_slack)
+    
+    def _is_valid(self, tasks_adj):
+        return self._allow_empty or len(set(tasks_adj)) == self._topology.num_inters
+    
+    def _gen_neighbours(self, tasks_adj):
+        neighbours = []
+        num_tasks = len(tasks_adj)
+        for task_i in range(num_tasks):
+            # Move
+            for inter_j in range(self._topology.num_inters):
+                if inter_j != tasks_adj[task_i]:
+                    neighbour = list(tasks_adj)
+                    neighbour[task_i] = inter_j
+                    neighbours.append(tuple(neighbour))
+            # Swap
+            for task_j in range(task_i + 1, num_tasks):
+                if tasks_adj[task_i] != tasks_adj[task_j]:
+                    neighbour = list(tasks_adj)
+                    neighbour[task_i], neighbour[task_j] = tasks_adj[task_j], tasks_adj[task_i]
+                    neighbours.append(tuple(neighbour))
+        
+        return [neighbour for neighbour in neighbours if self._is_valid(neighbour)]
+    
+    def _evaluate(self, candidates, best_score, executor):
+        '''
+        Score the candidates that may improve on best_score (None for pruned ones)
+        '''
+        scores = [None] * len(candidates)
+        to_eval = {}
+        for cand_i, tasks_adj in enumerate(candidates):
+            if best_score is not None and self.get_bound(tasks_adj) <= best_score:
+                self.num_pruned += 1
+                continue
+            
+            key = self.get_canonical(tasks_adj)
+            if key in self._scores:
+                self.num_cached += 1
+                scores[cand_i] = self._scores[key]
+            else:
+                to_eval.setdefault(key, []).append(cand_i)
+        
+        keys = list(to_eval)
+        placements = [candidates[to_eval[key][0]] for key in keys]
+        if executor is None:
+            results = [eval_placement(self._topology, tasks_adj) for tasks_adj in placements]
+        else:
+            results = executor.map(_eval_worker, placements, chunksize = max(len(placements) // (4 * self._num_workers), 1))
+        
+        for key, score in zip(keys, results):
+            self.num_evaluated += 1
+            self._scores[key] = score
+            for cand_i in to_eval[key]:
+                scores[cand_i] = score
+        
+        return scores
+    
+    def _gen_random_placement(self):
+        num_tasks, num_inters = self._topology.num_tasks, self._topology.num_inters
+        tasks_adj = self._rng.integers(num_inters, size = num_tasks)
+        if not self._allow_empty:
+            # One task on each Interconnect, the others at random
+            tasks_adj[self._rng.permutation(num_tasks)[:num_inters]] = np.arange(num_inters)
+        
+        return tuple(tasks_adj.tolist())
+    
+    def _climb(self, tasks_adj, executor):
+        score = self._evaluate([tasks_adj], None, executor)[0]
+        for _ in range(self._max_iters):
+            neighbours = self._gen_neighbours(tasks_adj)
+            scores = self._evaluate(neighbours, score, executor)
+            best_i = max((cand_i for cand_i, cand_score in enumerate(scores) if cand_score is not None),
+                         key = lambda cand_i: scores[cand_i], default = None)
+            if best_i is None or scores[best_i] <= score:
+                break
+            tasks_adj, score = neighbours[best_i], scores[best_i]
+        
+        return tasks_adj, score
+    
+    def run(self):
+        '''
+        Return the best placement found (Interconnect of each task) and its score
+        '''
+        starts = [tuple(self._topology.tasks_adj.tolist())]
+        starts += [self._gen_random_placement() for _ in range(self._restarts)]
+        
+        if self._num_workers > 0:
+            executor = fts.ProcessPoolExecutor(max_workers = self._num_workers, initializer = _init_worker,
+                                               initargs = (self._topology,))
+        else:
+            executor = None
+        
+        try:
+            best = None
+            for tasks_adj in starts:
+                tasks_adj, score = self._climb(tasks_adj, executor)
+                if best is None or score > best[1]:
+                    best = (np.array(tasks_adj), score)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        return best
+
+###################################################################################################
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,256 @@
+'''
+Artifact evaluation code for the paper:
+Francesco Restuccia, Marco Pagani, Alessandro Biondi, Mauro Marinoni, and Giorgio Buttazzo,
+"Modeling and Analysis of Bus Contention for Hardware Accelerators in FPGA SoCs",
+In Proceedings of the 32nd Euromicro Conference on Real-Time Systems (ECRTS 2020), July 7-10, 2020.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+@author: Marco Pag
+'''
+
+
+###################################################################################################
+
+import io
+import os
+import sys
+import glob
+import shutil
+import itertools
+import filecmp
+import argparse
+import tempfile
+import contextlib
+import multiprocessing as mp
+import numpy as np
+
+import axi_topology as topo
+import axi_workload as work
+import axi_system as axi
+import experiments as exp
+import placement as plc
+
+###################################################################################################
+
+SEED = 100
+
+# Configurations (num_tasks, num_inters) of the analysis checks
+CONFIGS = [(4, 1), (8, 2), (16, 4), (24, 8), (64, 16)]
+
+# Sharded run: a few tasksets per ratio point, the last block being partial
+SHARD_TASKSETS = 2500
+SHARD_POINTS = 5
+
+###################################################################################################
+
+def _gen_workload(num_tasks, c_to_tr_ratio):
+    workload = work.RandomFixedWorkload(num_tasks)
+    workload.generate(axi.ms_to_clks(10), axi.ms_to_clks(100), c_to_tr_ratio, 1, work.RandomFixedWorkload.slack_asc)
+    return workload
+
+
+def check_batch_system(num_sets = 200):
+    '''
+    BatchSystem gives the same response times as System for each workload of the batch,
+    and the same feasibility with and without early exit
+    '''
+    for num_tasks, num_inters in CONFIGS:
+        for c_to_tr_ratio in (0.2, 0.5, 0.8):
+            arrays = work.RandomFixedWorkload.generate_batch(num_sets, num_tasks, axi.ms_to_clks(10),
+                                                             axi.ms_to_clks(100), c_to_tr_ratio, 1,
+                                                             work.RandomFixedWorkload.slack_asc)
+            batch = axi.BatchSystem(topo.BinaryEvenTopology(work.DummyWorkload(num_tasks), num_inters))
+            feasible, resp_times = batch.check_feasible(**arrays)
+            feasible_lazy, _ = batch.check_feasible(**arrays, early_exit = True)
+            
+            for row in range(num_sets):
+                workload = work.RandomFixedWorkload(num_tasks)
+                workload.load_arrays(arrays, row)
+                system = axi.System(topo.BinaryEvenTopology(workload, num_inters))
+                if system.get_resp_times() != resp_times[row].tolist() \
+                        or system.check_feasible()[0] != feasible[row] or feasible_lazy[row] != feasible[row]:
+                    return False, 'tasks: {} inters: {} ratio: {} row: {}'.format(num_tasks, num_inters,
+                                                                                  c_to_tr_ratio, row)
+    
+    return True, ''
+
+
+def check_incremental_system(num_changes = 50):
+    '''
+    After each random change of the parameters or of the Interconnect of a task, IncrementalSystem
+    gives the same response times and feasibility as a System built from scratch
+    '''
+    for num_tasks, num_inters in CONFIGS:
+        workload = _gen_workload(num_tasks, 0.4)
+        system = axi.IncrementalSystem(topo.BinaryEvenTopology(workload, num_inters))
+        
+        for change in range(num_changes):
+            task_m = np.random.randint(num_tasks)
+            if np.random.rand() < 0.5:
+                task = workload.tasks[task_m]
+                system.set_task_params(task_m, trans_r = np.random.randint(2 * task.trans_r + 2),
+                                       trans_w = np.random.randint(2 * task.trans_w + 2),
+                                       period = int(task.period * np.random.uniform(0.5, 1.5)))
+            else:
+                system.move_task(task_m, np.random.randint(num_inters))
+            
+            fresh = axi.System(system.topology)
+            if system.get_resp_times() != fresh.get_resp_times() or system.check_feasible() != fresh.check_feasible():
+                return False, 'tasks: {} inters: {} change: {}'.format(num_tasks, num_inters, change)
+    
+    return True, ''
+
+
+def check_tree_topology():
+    '''
+    A TreeTopology whose Interconnects are randomly relabelled gives the same
+    response times as the BinaryEvenTopology it was built from. Below a routing-only
+    root (without tasks), BatchSystem gives the same response times as System
+    '''
+    for num_tasks, num_inters in CONFIGS:
+        workload = _gen_workload(num_tasks, 0.4)
+        topology = topo.BinaryEvenTopology(workload, num_inters)
+        
+        labels = np.random.permutation(num_inters)
+        inters_parent = np.full(num_inters, -1)
+        inters_parent[labels[1:]] = labels[topology.inters_parent[1:]]
+        tree = topo.TreeTopology(workload, inters_parent, labels[topology.tasks_adj])
+        
+        if axi.System(tree).get_resp_times() != axi.System(topology).get_resp_times():
+            return False, 'tasks: {} inters: {}'.format(num_tasks, num_inters)
+        
+        routed = topo.TreeTopology(workload, np.append(-1, topology.inters_parent + 1), topology.tasks_adj + 1)
+        _, resp_times = axi.BatchSystem(routed).check_feasible(**workload.to_arrays())
+        if axi.System(routed).get_resp_times() != resp_times[0].tolist():
+            return False, 'routing root, tasks: {} inters: {}'.format(num_tasks, num_inters)
+    
+    return True, ''
+
+
+def check_placement_pruning():
+    '''
+    The placement search prunes the moves of a memory-bound task with a tight period to a deeper
+    level, where it misses its deadline in isolation, and still returns a local optimum: no neighbour
+    of the returned placement has a better score. With a slower Interconnect, the bound of each
+    placement is still at least its score
+    '''
+    workload = work.DummyWorkload(6)
+    arrays = workload.to_arrays()
+    arrays['periods'][:] = [8000] + [axi.ms_to_clks(10)] * 5
+    arrays['c_time'][:] = 1000
+    arrays['trans_r'][:] = [100] + [1] * 5
+    workload.load_arrays(arrays)
+    topology = topo.BinaryEvenTopology(workload, 3)
+    
+    search = plc.PlacementSearch(topology, num_workers = 0, restarts = 2, seed = SEED)
+    tasks_adj, score = search.run()
+    if search.num_pruned == 0:
+        return False, 'no candidate pruned'
+    for neighbour in search._gen_neighbours(tuple(tasks_adj.tolist())):
+        if plc.eval_placement(topology, neighbour) > score:
+            return False, 'better neighbour: {}'.format(neighbour)
+    
+    workload = _gen_workload(6, 0.9)
+    topology = topo.BinaryEvenTopology(workload, 3)
+    workload.inters[1] = workload.inters[1]._replace(d_addr = 5000, d_data = 5000)
+    slow_search = plc.PlacementSearch(topology, num_workers = 0)
+    for tasks_adj in itertools.product(range(3), repeat = 6):
+        if slow_search._is_valid(tasks_adj) \
+                and plc.eval_placement(topology, tasks_adj) > slow_search.get_bound(tasks_adj):
+            return False, 'score above the bound: {}'.format(tasks_adj)
+    
+    return True, '{} pruned'.format(search.num_pruned)
+
+###################################################################################################
+
+def _run_node(node_dir, shard, num_workers):
+    '''
+    Run a shard (None for a single node run) of the experiment in node_dir, as a separate node would
+    '''
+    os.chdir(node_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        exp.parametric_workload_run_mp(num_tasksets = SHARD_TASKSETS, c_to_tr_points = SHARD_POINTS, seed = SEED,
+                                       num_workers = num_workers, status_interval = 0, cache = False, shard = shard)
+
+
+def check_shards(num_shards, num_workers = 2):
+    '''
+    Run num_shards shards concurrently, as local processes standing in for nodes, merge their
+    journals and compare the output files with the ones of a single node run, byte for byte
+    '''
+    with tempfile.TemporaryDirectory() as root:
+        nodes = []
+        for index in range(num_shards + 1):
+            node_dir = os.path.join(root, 'node_{}'.format(index))
+            os.makedirs(node_dir)
+            shard = (index, num_shards) if index < num_shards else None
+            nodes.append(mp.Process(target = _run_node, args = (node_dir, shard, num_workers)))
+        
+        for node in nodes:
+            node.start()
+        for node in nodes:
+            node.join()
+        if any(node.exitcode != 0 for node in nodes):
+            return False, 'a node failed'
+        
+        # Copy the journals of the shards on the node of the merge
+        merge_dir = os.path.join(root, 'merge')
+        os.makedirs(os.path.join(merge_dir, exp.OUT_DIR))
+        for index in range(num_shards):
+            shutil.copy(os.path.join(root, 'node_{}'.format(index), exp.get_journal_path((index, num_shards))),
+                        os.path.join(merge_dir, exp.OUT_DIR))
+        
+        cwd = os.getcwd()
+        os.chdir(merge_dir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                exp.merge_shards(num_shards, cache = False)
+        finally:
+            os.chdir(cwd)
+        
+        single_dir = os.path.join(root, 'node_{}'.format(num_shards), exp.OUT_DIR)
+        names = sorted(os.path.basename(path) for pattern in ('sched_*.csv', 'log_*.txt')
+                       for path in glob.glob(os.path.join(single_dir, pattern)))
+        if not names:
+            return False, 'no output files'
+        _, mismatch, errors = filecmp.cmpfiles(single_dir, os.path.join(merge_dir, exp.OUT_DIR), names, shallow = False)
+        if mismatch or errors:
+            return False, 'different outputs: {}'.format(', '.join(mismatch + errors))
+    
+    return True, '{} files'.format(len(names))
+
+###################################################################################################
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Consistency checks of the analysis and of the experiment')
+    parser.add_argument('--shards', type = int, default = 3,
+                        help = 'number of local shards compared with a single node run, 0 to skip this check')
+    args = parser.parse_args()
+    
+    np.random.seed(SEED)
+    checks = [
+        ('BatchSystem vs System', check_batch_system),
+        ('IncrementalSystem vs System', check_incremental_system),
+        ('TreeTopology relabelling and routing', check_tree_topology),
+        ('Placement search pruning', check_placement_pruning)
+    ]
+    if args.shards > 0:
+        checks.append(('{} shards + merge vs single node'.format(args.shards), lambda: check_shards(args.shards)))
+    
+    failed = False
+    for name, check in checks:
+        passed, info = check()
+        failed |= not passed
+        print('{: <40} {: <6} {}'.format(name, 'OK' if passed else 'FAIL', info))
+    
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,220 @@
+'''
+Artifact evaluation code for the paper:
+Francesco Restuccia, Marco Pagani, Alessandro Biondi, Mauro Marinoni, and Giorgio Buttazzo,
+"Modeling and Analysis of Bus Contention for Hardware Accelerators in FPGA SoCs",
+In Proceedings of the 32nd Euromicro Conference on Real-Time Systems (ECRTS 2020), July 7-10, 2020.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+@author: Marco Pag
+'''
+
+
+###################################################################################################
+
+import os
+import json
+import numpy as np
+
+###################################################################################################
+
+def get_config_path(root, num_tasks, num_inters):
+    return os.path.join(root, 't_{}_i_{}'.format(num_tasks, num_inters))
+
+
+def deadline_margin(margin):
+    '''
+    Criterion: a taskset is feasible if each response time is within (1 - margin) times the period
+    '''
+    return lambda resp_times, periods: np.all(resp_times <= (1 - margin) * periods, axis = 1)
+
+
+class ConfigStore(object):
+    '''
+    Per-taskset results of a configuration (grid sweep), stored in preallocated memory-mapped
+    .npy files: response times and periods (points x tasksets x tasks), index of the first task
+    missing its deadline, -1 if none (points x tasksets), and the blocks of tasksets already
+    stored (points x blocks). Blocks are written by the workers, while only one process
+    (the parent) marks them as written
+    '''
+    ARRAYS = ('resp_times', 'periods', 'failing', 'written')
+    
+    def __init__(self, path, mode = 'r'):
+        self._path = path
+        with open(os.path.join(path, 'meta.json')) as m_file:
+            self._meta = json.load(m_file)
+        
+        self._arrays = {name : np.load(os.path.join(path, name + '.npy'), mmap_mode = mode)
+                        for name in ConfigStore.ARRAYS}
+        
+    @staticmethod
+    def create(path, num_tasks, num_inters, c_to_tr_ratio_set, num_tasksets, block_size):
+        '''
+        Preallocate the arrays of a configuration (the files are sparse until written)
+        '''
+        os.makedirs(path, exist_ok = True)
+        num_points = len(c_to_tr_ratio_set)
+        num_blocks = -(-num_tasksets // block_size)
+        
+        specs = {
+            'resp_times'    : (np.int64, (num_points, num_tasksets, num_tasks)),
+            'periods'       : (np.int64, (num_points, num_tasksets, num_tasks)),
+            'failing'       : (np.int32, (num_points, num_tasksets)),
+            'written'       : (np.bool_, (num_points, num_blocks))
+        }
+        for name, (dtype, shape) in specs.items():
+            arr = np.lib.format.open_memmap(os.path.join(path, name + '.npy'), mode = 'w+',
+                                            dtype = dtype, shape = shape)
+            del arr
+        
+        # Written last: a store without meta data is incomplete
+        meta = {
+            'num_tasks'         : num_tasks,
+            'num_inters'        : num_inters,
+            'c_to_tr_ratio_set' : [float(ratio) for ratio in c_to_tr_ratio_set],
+            'num_tasksets'      : num_tasksets,
+            'block_size'        : block_size
+        }
+        with open(os.path.join(path, 'meta.json'), 'w') as m_file:
+            json.dump(meta, m_file)
+        
+        return ConfigStore(path, 'r+')
+    
+    def write_block(self, point_i, first, resp_times, periods):
+        '''
+        Store the results of the tasksets [first, first + K) of a ratio point
+        '''
+        last = first + resp_times.shape[0]
+        missed = resp_times > periods
+        
+        self._arrays['resp_times'][point_i, first:last] = resp_times
+        self._arrays['periods'][point_i, first:last] = periods
+        self._arrays['failing'][point_i, first:last] = np.where(np.any(missed, axis = 1),
+                                                                np.argmax(missed, axis = 1), -1)
+    
+    def mark_written(self, point_i, block_i):
+        self._arrays['written'][point_i, block_i] = True
+    
+    def flush(self):
+        for arr in self._arrays.values():
+            arr.flush()
+    
+    def get_rows(self, point_i):
+        '''
+        Indexes of the stored tasksets of a ratio point
+        '''
+        rows = np.repeat(self._arrays['written'][point_i], self.block_size)[:self.num_tasksets]
+        return np.flatnonzero(rows)
+    
+    def get_feasible(self, point_i, criterion = None):
+        '''
+        Feasibility of the stored tasksets of a ratio point according to criterion(resp_times, periods),
+        by default each task meets its deadline
+        '''
+        rows = self.get_rows(point_i)
+        resp_times = self._arrays['resp_times'][point_i][rows]
+        periods = self._arrays['periods'][point_i][rows]
+        
+        if criterion is None:
+            return self._arrays['failing'][point_i][rows] < 0
+        
+        return criterion(resp_times, periods)
+    
+    def get_curve(self, criterion = None):
+        '''
+        Fraction of stored tasksets that are feasible according to criterion (see get_feasible)
+        at each ratio point (nan if none is stored)
+        '''
+        sched = np.full(len(self.c_to_tr_ratio_set), np.nan)
+        for point_i in range(sched.shape[0]):
+            feasible = self.get_feasible(point_i, criterion)
+            if feasible.shape[0] > 0:
+                sched[point_i] = np.count_nonzero(feasible) / feasible.shape[0]
+        
+        return self.c_to_tr_ratio_set, sched
+    
+    def get_min_slack(self, point_i):
+        '''
+        Minimum slack relative to the period, (T - R) / T, of each stored taskset of a ratio point
+        '''
+        rows = self.get_rows(point_i)
+        resp_times = self._arrays['resp_times'][point_i][rows]
+        periods = self._arrays['periods'][point_i][rows]
+        
+        return np.min((periods - resp_times) / periods, axis = 1)
+    
+    def get_slack_curves(self, min_slacks):
+        '''
+        Fraction of stored tasksets whose minimum relative slack is at least each
+        of the values in min_slacks, at each ratio point (len(min_slacks) x points)
+        '''
+        min_slacks = np.asarray(min_slacks)
+        curves = np.full((min_slacks.shape[0], len(self.c_to_tr_ratio_set)), np.nan)
+        for point_i in range(curves.shape[1]):
+            slack = self.get_min_slack(point_i)
+            if slack.shape[0] > 0:
+                curves[:, point_i] = np.mean(slack[None, :] >= min_slacks[:, None], axis = 1)
+        
+        return curves
+    
+    def get_failing_counts(self):
+        '''
+        Number of stored tasksets whose first task missing its deadline is task i,
+        at each ratio point (points x tasks)
+        '''
+        counts = np.zeros((len(self.c_to_tr_ratio_set), self.num_tasks), dtype = int)
+        for point_i in range(counts.shape[0]):
+            failing = self._arrays['failing'][point_i][self.get_rows(point_i)]
+            counts[point_i] = np.bincount(failing[failing >= 0], minlength = self.num_tasks)
+        
+        return counts
+    
+    @property
+    def resp_times(self):
+        return self._arrays['resp_times']
+    
+    @property
+    def periods(self):
+        return self._arrays['periods']
+    
+    @property
+    def failing(self):
+        return self._arrays['failing']
+    
+    @property
+    def written(self):
+        return self._arrays['written']
+    
+    @property
+    def num_tasks(self):
+        return self._meta['num_tasks']
+    
+    @property
+    def num_tasksets(self):
+        return self._meta['num_tasksets']
+    
+    @property
+    def block_size(self):
+        return self._meta['block_size']
+    
+    @property
+    def c_to_tr_ratio_set(self):
+        return np.array(self._meta['c_to_tr_ratio_set'])
+    
+    @property
+    def meta(self):
+        return self._meta
+
+###################################################################################################
+
+if __name__ == '__main__':
+    pass
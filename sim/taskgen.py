@@ -45,13 +45,14 @@ Please contact paule@rapitasystems.com or robdavis@cs.york.ac.uk if you have
 any questions regarding this software.
 '''
 
+import functools
 import numpy
 
-def StaffordRandFixedSum(n, u, nsets):
-    #deal with n=1 case
-    if n == 1:
-        return numpy.tile(numpy.array([u]),[nsets,1])
-    
+@functools.lru_cache(maxsize=4)
+def _stafford_tables(n, u):
+    #transition table t only depends on (n, u): compute it once and cache it
+    #t is (n-1) x n floats, O(n^2) memory (134 MB for n = 4096), hence few tables are kept
+    #only the previous row of w is needed to compute the next one
     k = numpy.floor(u)
     s = u
     step = 1 if k < (k-n+1) else -1
@@ -62,22 +63,34 @@ def StaffordRandFixedSum(n, u, nsets):
     tiny = numpy.finfo(float).tiny
     huge = numpy.finfo(float).max
 
-    w = numpy.zeros((n, n+1))
-    w[0,1] = huge
+    w = numpy.zeros(n+1)
+    w[1] = huge
     t = numpy.zeros((n-1,n))
 
-    for i in numpy.arange(2, (n+1)):
-        tmp1 = w[i-2, numpy.arange(1,(i+1))] * s1[numpy.arange(0,i)]/float(i)
-        tmp2 = w[i-2, numpy.arange(0,i)] * s2[numpy.arange((n-i),n)]/float(i)
-        w[i-1, numpy.arange(1,(i+1))] = tmp1 + tmp2;
-        tmp3 = w[i-1, numpy.arange(1,(i+1))] + tiny;
-        tmp4 = numpy.array( (s2[numpy.arange((n-i),n)] > s1[numpy.arange(0,i)]) )
-        t[i-2, numpy.arange(0,i)] = (tmp2 / tmp3) * tmp4 + (1 - tmp1/tmp3) * (numpy.logical_not(tmp4))
+    for i in range(2, (n+1)):
+        tmp1 = w[1:(i+1)] * s1[0:i]/float(i)
+        tmp2 = w[0:i] * s2[(n-i):n]/float(i)
+        w = numpy.zeros(n+1)
+        w[1:(i+1)] = tmp1 + tmp2;
+        tmp3 = w[1:(i+1)] + tiny;
+        tmp4 = s2[(n-i):n] > s1[0:i]
+        t[i-2, 0:i] = (tmp2 / tmp3) * tmp4 + (1 - tmp1/tmp3) * (numpy.logical_not(tmp4))
+
+    t.flags.writeable = False
+    return k, t
+
+def StaffordRandFixedSum(n, u, nsets, rng=numpy.random):
+    #deal with n=1 case
+    if n == 1:
+        return numpy.tile(numpy.array([u]),[nsets,1])
+    
+    k, t = _stafford_tables(n, u)
+    s = u
 
     m = nsets
     x = numpy.zeros((n,m))
-    rt = numpy.random.uniform(size=(n-1,m)) #rand simplex type
-    rs = numpy.random.uniform(size=(n-1,m)) #rand position in simplex
+    rt = rng.uniform(size=(n-1,m)) #rand simplex type
+    rs = rng.uniform(size=(n-1,m)) #rand position in simplex
     s = numpy.repeat(s, m);
     j = numpy.repeat(int(k+1), m);
     sm = numpy.repeat(0, m);
@@ -95,25 +108,25 @@ def StaffordRandFixedSum(n, u, nsets):
     x[n-1,...] = sm + pr * s
     
     #iterated in fixed dimension order but needs to be randomised
-    #permute x row order within each column
-    for i in range(0,m):
-        x[...,i] = x[numpy.random.permutation(n),i]
+    #permute x row order within each column (all columns at once)
+    perm = numpy.argsort(rng.uniform(size=(n,m)), axis=0)
+    x = numpy.take_along_axis(x, perm, axis=0)
 
     return numpy.transpose(x);
 
-def gen_periods(n, nsets, min_p, max_p, gran, dist):
+def gen_periods(n, nsets, min_p, max_p, gran, dist, rng=numpy.random):
     if dist == "logunif":
-        periods = numpy.exp(numpy.random.uniform(low=numpy.log(min_p), high=numpy.log(max_p+gran), size=(nsets,n)))
+        periods = numpy.exp(rng.uniform(low=numpy.log(min_p), high=numpy.log(max_p+gran), size=(nsets,n)))
     elif dist == "unif":
-        periods = numpy.random.uniform(low=min_p, high=(max_p+gran), size=(nsets,n))
+        periods = rng.uniform(low=min_p, high=(max_p+gran), size=(nsets,n))
     else:
         return None
     periods = numpy.floor(periods / gran) * gran
 
     return periods
 
-def gen_tasksets_from_dict(opts = None):
-    if opts is None: opts = {
+def default_opts():
+    return {
         'num_tasks'    : 10,
         'utilization'  : 5,
         'num_sets'     : 2,
@@ -124,19 +137,28 @@ def gen_tasksets_from_dict(opts = None):
         'round_c'      : True
     }
 
+def gen_tasksets_arrays(opts = None, rng = numpy.random):
+    #rng: numpy.random (global state) or a numpy.random.Generator
+    if opts is None: opts = default_opts()
+
+    x = StaffordRandFixedSum(opts['num_tasks'], opts['utilization'], opts['num_sets'], rng)
+    periods = gen_periods(opts['num_tasks'], opts['num_sets'], opts['period_min'], opts['period_max'], opts['period_gran'], opts['period_distr'], rng)
+    C = x * periods
+    if opts['round_c']:
+        C = numpy.round(C, decimals=0)
+
+    # Numpy arrays, each row is a taskset: <'Ugen', 'T', 'C'>
+    return x, periods, C
+
+def gen_tasksets_from_dict(opts = None):
     tasksets = []
-    x = StaffordRandFixedSum(opts['num_tasks'], opts['utilization'], opts['num_sets'])
-    periods = gen_periods(opts['num_tasks'], opts['num_sets'], opts['period_min'], opts['period_max'], opts['period_gran'], opts['period_distr'])
+    x, periods, C = gen_tasksets_arrays(opts)
     #iterate through each row (which represents utils for a taskset)
     for i in range(numpy.size(x, axis=0)):
-        C = x[i] * periods[i]
-        if opts['round_c']:
-            C = numpy.round(C, decimals=0)
-        
         # Numpy array, each row is a task t:
         # <'Ugen' : taskset[t][0], 'U' : taskset[t][1], 'T' : taskset[t][2], 'C' : taskset[t][3]>
         # the actual utilization equal to C/T which will differ from U generated if the round-C option is used
-        taskset = numpy.c_[x[i], C / periods[i], periods[i], C]
+        taskset = numpy.c_[x[i], C[i] / periods[i], periods[i], C[i]]
         tasksets.append(taskset)
         
     return tasksets